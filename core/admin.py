@@ -1,6 +1,18 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from .models import Blog, Tutorial, Category, Profile, Certificate, Skill, Achievement, WorkExperience, User
+from . import search
+
+
+class IndexedSearchMixin:
+    # Answer the admin search box from the search index instead of
+    # LIKE '%term%' scans over search_fields
+    search_kind = None
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term.strip():
+            return queryset, False
+        return queryset.filter(pk__in=search.matching_ids(search_term, self.search_kind)), False
 
 class UserAdmin(BaseUserAdmin):
     list_display = ('email', 'username', 'is_staff', 'is_active', 'date_joined')
@@ -23,15 +35,16 @@ class UserAdmin(BaseUserAdmin):
 # Register the User model with the custom UserAdmin
 admin.site.register(User, UserAdmin)
 
-class BlogAdmin(admin.ModelAdmin):
+class BlogAdmin(IndexedSearchMixin, admin.ModelAdmin):
     # Display the following fields in the list view
     list_display = ('title', 'author', 'created_at', 'updated_at')
     
     # Enable filtering by author and created date
     list_filter = ('author', 'created_at')
     
-    # Enable searching by title and content
+    # Enable searching by title and content (answered by the search index)
     search_fields = ('title', 'content')
+    search_kind = 'blog'
     
     # Customize form layout and fields in the admin form
     fieldsets = (
@@ -51,9 +64,10 @@ admin.site.register(Blog, BlogAdmin)
 
 
 # Create admin class for Tutorial
-class TutorialAdmin(admin.ModelAdmin):
+class TutorialAdmin(IndexedSearchMixin, admin.ModelAdmin):
     list_display = ('title', 'author', 'created_at', 'updated_at', 'category')  # Fields to display
     search_fields = ('title', 'content')  # Fields to search in admin
+    search_kind = 'tutorial'  # Answered by the search index
     list_filter = ('created_at', 'author', 'category')  # Fields to filter by
     ordering = ('-created_at',)  # Default ordering
 
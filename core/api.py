@@ -0,0 +1,261 @@
+import json
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+from . import rendering, snapshots
+from .models import Blog, Category, Comment, Profile, Tutorial
+from .pagination import KeysetPaginator
+
+# A read-only JSON view of the public content. Every resource declares its
+# fields with the columns, joins and prefetches each one needs, so a request
+# for ?fields=id,title loads exactly those columns, and the number of
+# queries depends only on which to-many fields were asked for, never on
+# the page size. List pages are cursor-paginated (see core.pagination) and
+# streamed row by row rather than built as one string.
+API_PAGE_SIZE = getattr(settings, 'API_PAGE_SIZE', 20)
+API_MAX_PAGE_SIZE = getattr(settings, 'API_MAX_PAGE_SIZE', 100)
+
+
+class InvalidRequest(Exception):
+    # Bad query parameters; the view answers 400 with the message
+    pass
+
+
+class Field:
+    def __init__(self, value, columns=(), related=(), prefetch=()):
+        self.value = value
+        self.columns = tuple(columns)
+        self.related = tuple(related)
+        self.prefetch = tuple(prefetch)
+
+
+def column(name, convert=None):
+    def value(obj):
+        raw = getattr(obj, name)
+        return convert(raw) if convert else raw
+    return Field(value, columns=[name])
+
+
+def _file_url(file):
+    return file.url if file else None
+
+
+def _isoformat(value):
+    return value.isoformat() if value else None
+
+
+def user_field(name, *extra):
+    # A foreign key to User, rendered as a small nested object
+    attributes = ('id', 'username') + extra
+
+    def value(obj):
+        user = getattr(obj, name)
+        return {attribute: getattr(user, attribute) for attribute in attributes}
+    return Field(value, columns=[name] + [f'{name}__{attribute}' for attribute in attributes], related=[name])
+
+
+def _content_html(obj):
+    return str(rendering.html_for(obj))
+
+
+def related_rows(name):
+    return Field(lambda profile: snapshots.serialize_related(profile, name), prefetch=[name])
+
+
+class Resource:
+    """
+    One model exposed by the API: its fields, the fields returned when
+    ?fields= is absent (for lists and for single objects), the keyset
+    ordering of its lists and the integer filters lists accept.
+    """
+
+    def __init__(self, model, fields, list_fields, ordering, filters=None):
+        self.model = model
+        self.fields = fields
+        self.list_fields = tuple(list_fields)
+        self.ordering = tuple(ordering)
+        self.filters = filters or {}
+
+    def field_names(self, raw, many):
+        if not raw:
+            return self.list_fields if many else tuple(self.fields)
+        names = tuple(dict.fromkeys(name.strip() for name in raw.split(',') if name.strip()))
+        unknown = [name for name in names if name not in self.fields]
+        if unknown or not names:
+            raise InvalidRequest(
+                f"Unknown fields: {', '.join(unknown) or raw}. Available: {', '.join(self.fields)}."
+            )
+        return names
+
+    def queryset(self, names, base=None):
+        # Only the columns, joins and prefetches the requested fields use;
+        # the primary key and ordering columns are always loaded for cursors
+        columns = {'pk', *(name.lstrip('-') for name in self.ordering)}
+        related = set()
+        prefetch = []
+        for name in names:
+            field = self.fields[name]
+            columns.update(field.columns)
+            related.update(field.related)
+            prefetch.extend(lookup for lookup in field.prefetch if lookup not in prefetch)
+        queryset = base if base is not None else self.model.objects.all()
+        if related:
+            queryset = queryset.select_related(*sorted(related))
+        if prefetch:
+            queryset = queryset.prefetch_related(*(self.prefetch_lookup(name) for name in prefetch))
+        return queryset.only(*columns)
+
+    def prefetch_lookup(self, name):
+        return name
+
+    def filter(self, queryset, params):
+        for param, lookup in self.filters.items():
+            value = params.get(param)
+            if value is None or value == '':
+                continue
+            try:
+                queryset = queryset.filter(**{lookup: int(value)})
+            except ValueError:
+                raise InvalidRequest(f"{param} must be an integer.")
+        return queryset
+
+    def serialize(self, obj, names):
+        return {name: self.fields[name].value(obj) for name in names}
+
+
+class ProfileResource(Resource):
+    def prefetch_lookup(self, name):
+        # Related rows come back in the same order as the profile pages show them
+        return snapshots.prefetch(name)
+
+
+def _content_fields(**extra):
+    # Fields shared by blogs and tutorials
+    return {
+        'id': column('id'),
+        'title': column('title'),
+        'excerpt': column('excerpt'),
+        'reading_time': column('reading_time'),
+        'content': column('content'),
+        'content_html': Field(_content_html, columns=rendering.RENDERED_FIELDS + ['content']),
+        'author': user_field('author', 'first_name', 'last_name'),
+        'video': column('video', _file_url),
+        **extra,
+        'like_count': column('like_count'),
+        'dislike_count': column('dislike_count'),
+        'comment_count': column('comment_count'),
+        'created_at': column('created_at', _isoformat),
+        'updated_at': column('updated_at', _isoformat),
+    }
+
+
+CONTENT_LIST_FIELDS = (
+    'id', 'title', 'excerpt', 'reading_time', 'author', 'like_count', 'dislike_count', 'comment_count',
+    'created_at', 'updated_at',
+)
+
+RESOURCES = {
+    'blogs': Resource(
+        Blog,
+        _content_fields(image=column('image', _file_url)),
+        list_fields=CONTENT_LIST_FIELDS + ('image', 'video'),
+        ordering=('-created_at', '-id'),
+        filters={'author': 'author_id'},
+    ),
+    'tutorials': Resource(
+        Tutorial,
+        _content_fields(category=Field(
+            lambda tutorial: {'id': tutorial.category.id, 'name': tutorial.category.name},
+            columns=['category', 'category__name'], related=['category'],
+        )),
+        list_fields=CONTENT_LIST_FIELDS + ('category', 'video'),
+        ordering=('-created_at', '-id'),
+        filters={'author': 'author_id', 'category': 'category_id'},
+    ),
+    'categories': Resource(
+        Category,
+        {
+            'id': column('id'),
+            'name': column('name'),
+            'tutorial_count': column('tutorial_count'),
+            'created_at': column('created_at', _isoformat),
+            'updated_at': column('updated_at', _isoformat),
+        },
+        list_fields=('id', 'name', 'tutorial_count'),
+        ordering=('id',),
+    ),
+    'profiles': ProfileResource(
+        Profile,
+        {
+            'id': column('id'),
+            'user': user_field('user', 'first_name', 'last_name'),
+            'bio': column('bio'),
+            'career_journey': column('career_journey'),
+            'location': column('location'),
+            'contact_number': column('contact_number'),
+            'profile_picture': column('profile_picture', _file_url),
+            **{name: column(name) for name in snapshots.SOCIAL_FIELDS},
+            **{name: related_rows(name) for name in snapshots.RELATED},
+        },
+        list_fields=('id', 'user', 'bio', 'location', 'profile_picture'),
+        ordering=('-id',),
+    ),
+}
+
+# Comments are listed under their blog or tutorial, oldest first
+COMMENTS = Resource(
+    Comment,
+    {
+        'id': column('id'),
+        'content': column('content'),
+        'user': user_field('user'),
+        'created_at': column('created_at', _isoformat),
+        'updated_at': column('updated_at', _isoformat),
+    },
+    list_fields=('id', 'content', 'user', 'created_at'),
+    ordering=('created_at', 'id'),
+)
+COMMENT_PARENTS = {'blogs': 'blog', 'tutorials': 'tutorial'}
+
+
+def page_size(params):
+    raw = params.get('limit')
+    if not raw:
+        return API_PAGE_SIZE
+    try:
+        size = int(raw)
+    except ValueError:
+        raise InvalidRequest("limit must be an integer.")
+    if not 1 <= size <= API_MAX_PAGE_SIZE:
+        raise InvalidRequest(f"limit must be between 1 and {API_MAX_PAGE_SIZE}.")
+    return size
+
+
+def get_page(resource, params, base=None):
+    # (page, field names) for one list request; the page's rows (and their
+    # prefetches) are loaded here, so streaming it runs no further queries
+    names = resource.field_names(params.get('fields'), many=True)
+    queryset = resource.filter(resource.queryset(names, base), params)
+    paginator = KeysetPaginator(queryset, page_size(params), ordering=resource.ordering)
+    cursor = params.get('cursor')
+    if cursor and paginator.decode_cursor(cursor) is None:
+        # Pages fall back to the first page; an API client should know
+        raise InvalidRequest("Invalid cursor.")
+    return paginator.get_page(cursor), names
+
+
+def get_object(resource, pk, params):
+    # Serialized object, or None if there is no such row
+    names = resource.field_names(params.get('fields'), many=False)
+    obj = resource.queryset(names).filter(pk=pk).first()
+    return resource.serialize(obj, names) if obj is not None else None
+
+
+def stream_page(resource, page, names, next_url, previous_url):
+    # The list response, one JSON fragment per row
+    encoder = DjangoJSONEncoder(separators=(',', ':'))
+    yield '{"results":['
+    for position, obj in enumerate(page):
+        yield (',' if position else '') + encoder.encode(resource.serialize(obj, names))
+    yield f'],"next":{json.dumps(next_url)},"previous":{json.dumps(previous_url)}}}'
@@ -0,0 +1,305 @@
+import random
+import re
+import statistics
+import time
+from datetime import date, timedelta
+
+from django.db import connection
+from django.test import Client
+from django.urls import get_resolver, reverse
+from django.utils import timezone
+
+from . import caching, counters, feeds, rendering, search, snapshots, trending, unread
+from .models import (
+    Achievement, Blog, Category, Certificate, ChatMember, Comment, Follow, Job, LikeDislike, MentorshipChat,
+    MentorshipMessage, Profile, Skill, Tutorial, User, WorkExperience,
+)
+
+TRANSACTION_CONTROL_RE = re.compile(
+    r"^\s*(SAVEPOINT|RELEASE SAVEPOINT|ROLLBACK TO SAVEPOINT)\b", re.IGNORECASE
+)
+
+# Routes that are not measured, with the reason shown in the report
+SKIPPED_ROUTES = {
+    'chat_events': "long-lived event stream, needs the ASGI application",
+    'stream_video': "serves media files, not database-bound",
+}
+
+
+def seed_dataset(scale=1, seed=0):
+    """
+    Create a small but realistic dataset: journalists with full profiles,
+    staff mentors, blogs and tutorials with comments and votes, follows and
+    mentorship chats, and a failed background job. Rows are bulk-inserted, then the derived data
+    (counters, rendered Markdown, trending, search, unread, profile
+    snapshots, timelines) is rebuilt the same way the repair commands do.
+    Returns the objects the route table needs.
+    """
+    rng = random.Random(seed)
+    user_count = 20 * scale
+    users = User.objects.bulk_create([
+        User(
+            email=f"bench{i}@example.com",
+            username=f"bench{i}",
+            first_name=f"First{i}",
+            last_name=f"Last{i}",
+            is_staff=i < 3,
+        )
+        for i in range(user_count)
+    ])
+    users = list(User.objects.filter(username__startswith='bench').order_by('id'))
+    member = users[-1]
+    member.set_password('bench-password')
+    member.save(update_fields=['password'])
+
+    Profile.objects.bulk_create([
+        Profile(
+            user=user,
+            bio=f"Reporter covering politics, health and climate, profile {user.id}.",
+            location=rng.choice(["Lilongwe", "Blantyre", "Mzuzu", "Zomba"]),
+            contact_number="0999000000",
+        )
+        for user in users
+    ])
+    profiles = list(Profile.objects.filter(user__in=users).order_by('id'))
+    Certificate.objects.bulk_create([
+        Certificate(profile=profile, title="Data Journalism", institution="Press Institute",
+                    date_issued=date(2022, 1, 1) + timedelta(days=n))
+        for profile in profiles for n in range(2)
+    ])
+    Skill.objects.bulk_create([
+        Skill(profile=profile, name=name)
+        for profile in profiles for name in rng.sample(["Editing", "Research", "Video", "Radio", "Data"], 3)
+    ])
+    Achievement.objects.bulk_create([
+        Achievement(profile=profile, title="Story of the Year", date_achieved=date(2023, 6, 1))
+        for profile in profiles
+    ])
+    WorkExperience.objects.bulk_create([
+        WorkExperience(profile=profile, job_title="Reporter", company_name="Daily News",
+                       start_date=date(2019, 1, 1))
+        for profile in profiles
+    ])
+
+    categories = Category.objects.bulk_create([
+        Category(name=name) for name in ("Writing", "Photography", "Data", "Broadcast")
+    ])
+    categories = list(Category.objects.order_by('id'))
+    paragraph = "Reporting on the ground means checking every fact twice. " * 20
+    Blog.objects.bulk_create([
+        Blog(title=f"Field notes {i}", content=paragraph, author=rng.choice(users))
+        for i in range(40 * scale)
+    ])
+    Tutorial.objects.bulk_create([
+        Tutorial(title=f"How to interview {i}", content=paragraph, author=rng.choice(users),
+                 category=rng.choice(categories))
+        for i in range(30 * scale)
+    ])
+    blogs = list(Blog.objects.order_by('id'))
+    tutorials = list(Tutorial.objects.order_by('id'))
+
+    comments = []
+    votes = []
+    for target_field, targets in (('blog', blogs), ('tutorial', tutorials)):
+        for target in targets:
+            for n in range(rng.randint(0, 12)):
+                comments.append(Comment(user=rng.choice(users), content=f"Comment {n}", **{target_field: target}))
+            for voter in rng.sample(users, rng.randint(0, len(users) // 2)):
+                votes.append(LikeDislike(user=voter, is_like=rng.random() < 0.8, **{target_field: target}))
+    Comment.objects.bulk_create(comments, batch_size=500)
+    LikeDislike.objects.bulk_create(votes, batch_size=500)
+
+    Follow.objects.bulk_create([
+        Follow(follower=user, author=author)
+        for user in users for author in rng.sample(users, 4) if author != user
+    ], ignore_conflicts=True)
+
+    mentors = users[:3]
+    MentorshipChat.objects.bulk_create([
+        MentorshipChat(participant_one=mentor, participant_two=user, last_message="Thanks!")
+        for user in users[3:] for mentor in rng.sample(mentors, 1)
+    ])
+    chats = list(MentorshipChat.objects.select_related('participant_one', 'participant_two').order_by('id'))
+    ChatMember.objects.bulk_create([
+        ChatMember(chat=chat, user_id=user_id)
+        for chat in chats for user_id in (chat.participant_one_id, chat.participant_two_id)
+    ])
+    MentorshipMessage.objects.bulk_create([
+        MentorshipMessage(chat=chat, sender=rng.choice([chat.participant_one, chat.participant_two]),
+                          content=f"Message {n}")
+        for chat in chats for n in range(rng.randint(5, 60))
+    ], batch_size=500)
+
+    counters.recount_engagement()
+    rendering.rerender_all()
+    trending.rebuild()
+    search.rebuild()
+    unread.reconcile()
+    snapshots.rebuild_all()
+    feeds.rebuild_all()
+
+    failed_job = Job.objects.create(
+        task=feeds.fan_out.job_name, args=['blog', 0], status='failed', attempts=5, max_attempts=5,
+        last_error="Traceback (most recent call last): ...", finished_at=timezone.now(),
+    )
+
+    member_chat = MentorshipChat.objects.filter(participant_two=member).first()
+    return {
+        'member': member,
+        'staff': users[0],
+        'failed_job': failed_job,
+        'mentor': member_chat.participant_one,
+        'chat': member_chat,
+        # The busiest threads are the interesting ones to measure
+        'blog': Blog.objects.order_by('-comment_count', 'id').first(),
+        'tutorial': Tutorial.objects.order_by('-comment_count', 'id').first(),
+        'profile': Profile.objects.get(user=member),
+        'category': categories[0],
+    }
+
+
+def route_table(data):
+    """
+    One entry per measured request: (route name, method, path args, extra
+    request kwargs, who is signed in, query budget). Who is signed in is
+    False, True (an ordinary member) or 'staff'. Budgets are the number of
+    SQL queries the request may issue; raise one only with a reason. An
+    extra `status` kwarg is the status code the request must return. An extra
+    `revalidate` kwarg first fetches the page, unmeasured, until it carries
+    an ETag, and then measures a conditional GET with that tag, which must
+    come back 304 with an empty body.
+    """
+    return [
+        ('landing', 'get', [], {}, False, 0),
+        ('posts', 'get', [], {}, False, 2),
+        ('posts', 'get', [], {}, True, 3),
+        ('posts', 'get', [], {'revalidate': True, 'status': 304}, True, 2),
+        ('tutorials', 'get', [], {}, False, 2),
+        ('tutorials', 'get', [], {'data': {'category': data['category'].id}}, True, 4),
+        ('tutorial_detail', 'get', [data['tutorial'].id], {}, False, 2),
+        ('tutorial_detail', 'get', [data['tutorial'].id], {'revalidate': True, 'status': 304}, False, 0),
+        ('login', 'get', [], {}, False, 0),
+        ('logout', 'post', [], {}, True, 4),
+        ('add_comment', 'post', [data['blog'].id], {'data': {'content': "Benchmark comment"}}, True, 6),
+        ('add_tutorial_comment', 'post', [data['tutorial'].id], {'data': {'content': "Benchmark comment"}}, True, 6),
+        ('vote', 'post', ['blog', data['blog'].id, 'like'], {'HTTP_X_REQUESTED_WITH': 'XMLHttpRequest'}, True, 7),
+        ('vote', 'post', ['tutorial', data['tutorial'].id, 'dislike'], {}, True, 6),
+        ('post_detail', 'get', [data['blog'].id], {}, False, 2),
+        ('post_detail', 'get', [data['blog'].id], {}, True, 4),
+        ('post_detail', 'get', [data['blog'].id], {'revalidate': True, 'status': 304}, True, 2),
+        ('mentorship', 'get', [], {}, True, 4),
+        ('chat_detail', 'get', [data['chat'].id, 'chat_id'], {}, True, 9),
+        ('chat_detail', 'get', [data['mentor'].id, 'recipient_id'], {}, True, 7),
+        ('send_message', 'post', [data['chat'].id], {'data': {'message': "Benchmark message"}}, True, 8),
+        ('chat_messages', 'get', [data['chat'].id], {}, True, 4),
+        ('chat_mark_read', 'post', [data['chat'].id], {'status': 200}, True, 7),
+        ('profiles', 'get', [], {}, False, 3),
+        ('profiles', 'get', [], {'data': {'location': 'Zomba', 'skill': 'Data', 'sort': 'location'}}, True, 5),
+        ('journalist_detail', 'get', [data['profile'].id], {}, False, 1),
+        ('journalist_detail', 'get', [data['mentor'].profile.id], {}, True, 4),
+        ('journalist_detail', 'get', [data['mentor'].profile.id], {'revalidate': True, 'status': 304}, True, 2),
+        ('toggle_follow', 'post', [data['mentor'].id], {}, True, 9),
+        ('search', 'get', [], {'data': {'q': "reporting"}}, False, 3),
+        ('api_list', 'get', ['blogs'], {'data': {'limit': 50}}, False, 1),
+        ('api_list', 'get', ['tutorials'], {'data': {'category': data['category'].id, 'fields': 'id,title,category'}}, False, 1),
+        ('api_list', 'get', ['categories'], {}, False, 1),
+        ('api_list', 'get', ['profiles'], {'data': {'fields': 'id,user,skills,work_experience'}}, False, 3),
+        ('api_detail', 'get', ['blogs', data['blog'].id], {}, False, 1),
+        ('api_detail', 'get', ['profiles', data['profile'].id], {}, False, 5),
+        ('api_comments', 'get', ['tutorials', data['tutorial'].id], {}, False, 2),
+        ('performance_stats', 'get', [], {'status': 200}, 'staff', 2),
+        ('job_status', 'get', [], {'status': 200}, 'staff', 7),
+        ('job_retry', 'post', [data['failed_job'].id], {'status': 302}, 'staff', 3),
+    ]
+
+
+def core_route_names():
+    resolver = get_resolver('core.urls')
+    return {pattern.name for pattern in resolver.url_patterns if pattern.name}
+
+
+class QueryRecorder:
+    # connection.execute_wrapper hook timing each query with perf_counter;
+    # connection.queries only keeps millisecond precision. Savepoint
+    # statements are not counted, since whether atomic() emits them depends
+    # on the caller (the test runner wraps everything in a transaction).
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            if not TRANSACTION_CONTROL_RE.match(sql):
+                self.queries.append((sql, time.perf_counter() - started))
+
+
+def measure(data, repeat=3):
+    # Issue every route `repeat` times and record queries, SQL and wall time.
+    # Start from cold page/fragment caches; repeats may then be cache hits.
+    caching.bump_all()
+    results = []
+    for name, method, args, extra, signed_in, budget in route_table(data):
+        path = reverse(f'core:{name}', args=args)
+        extra = dict(extra)
+        revalidate = extra.pop('revalidate', False)
+        expected_status = extra.pop('status', None)
+        samples = []
+        for _ in range(repeat):
+            client = Client()
+            if signed_in:
+                client.force_login(data['staff'] if signed_in == 'staff' else data['member'])
+            request_kwargs = extra
+            if revalidate:
+                # The first visit may only set the CSRF cookie; the next one is tagged
+                etag = None
+                for _ in range(2):
+                    etag = etag or getattr(client, method)(path, **extra).get('ETag')
+                request_kwargs = {**extra, 'HTTP_IF_NONE_MATCH': etag}
+            recorder = QueryRecorder()
+            with connection.execute_wrapper(recorder):
+                started = time.perf_counter()
+                response = getattr(client, method)(path, **request_kwargs)
+                if getattr(response, 'streaming', False):
+                    body = b''.join(response.streaming_content)
+                else:
+                    body = response.content
+                wall = time.perf_counter() - started
+            samples.append({
+                'status': response.status_code,
+                'bytes': len(body),
+                'queries': len(recorder.queries),
+                'sql_ms': sum(elapsed for _, elapsed in recorder.queries) * 1000,
+                'wall_ms': wall * 1000,
+                'sql': [sql for sql, _ in recorder.queries],
+            })
+        results.append({
+            'route': name,
+            'method': method.upper(),
+            'path': path,
+            'signed_in': signed_in,
+            'status': samples[-1]['status'],
+            'expected_status': expected_status,
+            'revalidated': revalidate,
+            'bytes': samples[-1]['bytes'],
+            'queries': max(sample['queries'] for sample in samples),
+            'budget': budget,
+            'sql_ms': statistics.median(sample['sql_ms'] for sample in samples),
+            'wall_ms': statistics.median(sample['wall_ms'] for sample in samples),
+            'sql': samples[-1]['sql'],
+        })
+    return results
+
+
+def over_budget(results):
+    return [result for result in results if result['queries'] > result['budget']]
+
+
+def unexpected_status(results):
+    # Wrong status code, or a revalidation that sent a body after all
+    return [
+        result for result in results
+        if (result['expected_status'] is not None and result['status'] != result['expected_status'])
+        or (result['revalidated'] and result['bytes'])
+    ]
@@ -0,0 +1,46 @@
+from django.db import connections, router, transaction
+
+
+def upsert(model, rows, unique_field, update_fields):
+    """
+    Insert rows, or update update_fields of the rows whose unique_field
+    already exists. Uses the backend's native upsert where it has one;
+    returns the number of rows written.
+    """
+    if not rows:
+        return 0
+    using = router.db_for_write(model)
+    features = connections[using].features
+    if features.supports_update_conflicts_with_target:
+        # PostgreSQL, SQLite: ON CONFLICT (unique_field) DO UPDATE
+        model.objects.using(using).bulk_create(
+            rows, update_conflicts=True, unique_fields=[unique_field], update_fields=update_fields,
+        )
+    elif features.supports_update_conflicts:
+        # MySQL/MariaDB: ON DUPLICATE KEY UPDATE fires on any unique index and
+        # cannot be given a conflict target; unique_field must be that index
+        model.objects.using(using).bulk_create(rows, update_conflicts=True, update_fields=update_fields)
+    else:
+        _update_then_insert(model, rows, unique_field, update_fields, using)
+    return len(rows)
+
+
+def _update_then_insert(model, rows, unique_field, update_fields, using):
+    attname = model._meta.get_field(unique_field).attname
+    fields = [model._meta.get_field(name) for name in update_fields]
+    with transaction.atomic(using=using):
+        existing = set(
+            model.objects.using(using)
+            .filter(**{f'{unique_field}__in': [getattr(row, attname) for row in rows]})
+            .values_list(attname, flat=True)
+        )
+        updates = [row for row in rows if getattr(row, attname) in existing]
+        for row in updates:
+            # bulk_update skips pre_save; keep auto_now columns current
+            for field in fields:
+                setattr(row, field.attname, field.pre_save(row, add=False))
+        if updates:
+            model.objects.using(using).bulk_update(updates, update_fields)
+        model.objects.using(using).bulk_create(
+            [row for row in rows if getattr(row, attname) not in existing]
+        )
@@ -0,0 +1,192 @@
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.contrib.messages.storage.session import SessionStorage
+from django.core.cache import caches
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+
+# Cached pages and fragments are keyed by "generations": counters that are
+# bumped by core.signals whenever a row of the matching models changes. A
+# bump changes every key built from that generation, so stale entries are
+# never read again and simply age out of the cache; no TTL has to be short
+# for updates to show up immediately.
+GENERATIONS = ('blogs', 'tutorials', 'comments', 'votes', 'profiles', 'categories', 'follows', 'timelines')
+
+# Ceiling on how long an entry may live; freshness comes from the generations
+PAGE_CACHE_TIMEOUT = getattr(settings, 'PAGE_CACHE_TIMEOUT', 3600)
+
+
+def get_cache():
+    return caches[getattr(settings, 'PAGE_CACHE_ALIAS', 'default')]
+
+
+def _key(name):
+    return f"core:gen:{name}"
+
+
+def _seed():
+    # Starting value for a generation the cache has lost (eviction, restart).
+    # Millisecond time keeps it above any value handed out before the loss.
+    return int(time.time() * 1000)
+
+
+def bump(*names):
+    cache = get_cache()
+    for name in names:
+        key = _key(name)
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Not in the cache: start a fresh generation, unless another
+            # process beat us to it, in which case bump theirs
+            if not cache.add(key, _seed(), timeout=None):
+                cache.incr(key)
+
+
+def bump_all():
+    bump(*GENERATIONS)
+
+
+def bump_on_commit(*names):
+    # Bumping before commit would let a concurrent request cache the old
+    # rows under the new generation
+    transaction.on_commit(lambda: bump(*names))
+
+
+def generations(*names):
+    cache = get_cache()
+    keys = [_key(name) for name in names]
+    values = cache.get_many(keys)
+    missing = [key for key in keys if key not in values]
+    for key in missing:
+        cache.add(key, _seed(), timeout=None)
+    if missing:
+        values.update(cache.get_many(missing))
+    return [values.get(key, 0) for key in keys]
+
+
+def version_token(*names):
+    # Compact string for {% cache %} vary_on arguments
+    return ".".join(str(value) for value in generations(*names))
+
+
+def cache_anonymous_page(*depends_on, timeout=None):
+    """
+    Cache the whole response of a GET view for anonymous visitors, keyed by
+    the full path and the generations of the models it renders. Signed-in
+    users, visitors with pending flash messages and responses that issued a
+    CSRF token always go to the view.
+    """
+    for name in depends_on:
+        if name not in GENERATIONS:
+            raise ValueError(f"Unknown cache generation: {name}")
+
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapped_view(request, *args, **kwargs):
+            if (
+                request.method not in ('GET', 'HEAD')
+                or request.user.is_authenticated
+                or CookieStorage.cookie_name in request.COOKIES
+            ):
+                return view_func(request, *args, **kwargs)
+
+            cache = get_cache()
+            path_hash = hashlib.md5(request.get_full_path().encode()).hexdigest()
+            key = f"core:page:{view_func.__name__}:{version_token(*depends_on)}:{path_hash}"
+            cached = cache.get(key)
+            if cached is not None:
+                content, content_type = cached
+                response = HttpResponse(content, content_type=content_type)
+                response['X-Page-Cache'] = 'hit'
+            else:
+                response = view_func(request, *args, **kwargs)
+                if (
+                    response.status_code == 200
+                    and not response.streaming
+                    and not response.cookies
+                    and not request.META.get('CSRF_COOKIE_NEEDS_UPDATE')
+                ):
+                    cache.set(key, (response.content, response['Content-Type']),
+                              timeout or PAGE_CACHE_TIMEOUT)
+                response['X-Page-Cache'] = 'miss'
+            patch_vary_headers(response, ('Cookie',))
+            return response
+        return wrapped_view
+    return decorator
+
+
+def _has_pending_messages(request):
+    # Flash messages are shown once, so a page carrying them is never a
+    # revalidated copy. The session is only read if the user has one.
+    if CookieStorage.cookie_name in request.COOKIES:
+        return True
+    return settings.SESSION_COOKIE_NAME in request.COOKIES and SessionStorage.session_key in request.session
+
+
+def _new_csrf_cookie(request):
+    return (
+        request.META.get('CSRF_COOKIE_NEEDS_UPDATE', False)
+        and request.META.get('CSRF_COOKIE') != request.COOKIES.get(settings.CSRF_COOKIE_NAME)
+    )
+
+
+def page_etag(request, depends_on):
+    # What the page shows: the generations of its models, the full path and
+    # the viewer. Signed-in pages render the unread badge, and every page
+    # may embed the CSRF token, so both are part of the tag.
+    viewer = 'anonymous'
+    if request.user.is_authenticated:
+        viewer = f"{request.user.pk}:{request.user.unread_message_count}"
+    parts = [
+        request.get_full_path(),
+        version_token(*depends_on),
+        viewer,
+        request.COOKIES.get(settings.CSRF_COOKIE_NAME, ''),
+    ]
+    return '"%s"' % hashlib.md5("|".join(parts).encode()).hexdigest()
+
+
+def conditional_page(*depends_on):
+    """
+    Answer a GET of the view with 304 Not Modified, before the view runs,
+    when the client (or a front cache) already holds the current page. The
+    ETag comes from page_etag, so it changes whenever a generation the page
+    depends on is bumped, and costs no database queries beyond loading the
+    signed-in user. Pages carrying flash messages are neither tagged nor
+    answered with 304.
+    """
+    for name in depends_on:
+        if name not in GENERATIONS:
+            raise ValueError(f"Unknown cache generation: {name}")
+
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapped_view(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD') or _has_pending_messages(request):
+                return view_func(request, *args, **kwargs)
+
+            etag = page_etag(request, depends_on)
+            response = get_conditional_response(request, etag=etag)
+            if response is None:
+                response = view_func(request, *args, **kwargs)
+                # A response that sets cookies changes the tag of the next
+                # request, so it is not tagged itself. The CSRF cookie is
+                # re-sent whenever a token is rendered; only a new value counts.
+                if response.status_code != 200 or response.cookies or _new_csrf_cookie(request):
+                    return response
+            response.headers.setdefault('ETag', etag)
+            patch_vary_headers(response, ('Cookie',))
+            # Stored copies must be revalidated; signed-in pages stay out of shared caches
+            if request.user.is_authenticated:
+                patch_cache_control(response, private=True, no_cache=True)
+            else:
+                patch_cache_control(response, no_cache=True)
+            return response
+        return wrapped_view
+    return decorator
@@ -0,0 +1,6 @@
+def unread_messages(request):
+    # Header badge count; read from the already-loaded user row, no query
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return {'total_unread_messages': None}
+    return {'total_unread_messages': user.unread_message_count}
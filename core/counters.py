@@ -0,0 +1,183 @@
+import atexit
+import logging
+import threading
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, connections, transaction
+from django.db.models import Case, Count, F, IntegerField, OuterRef, Subquery, Value, When
+from django.db.models.functions import Coalesce
+
+from . import caching, trending
+from .models import Blog, Category, Comment, LikeDislike, Tutorial
+
+logger = logging.getLogger(__name__)
+
+# Vote counters and trending engagement are not written per row: deltas are
+# summed in a per-process buffer and applied in one UPDATE per table, either
+# once COUNTER_BUFFER_MAX_PENDING rows are dirty or COUNTER_BUFFER_FLUSH_SECONDS
+# after the first pending delta. A hot post then takes one row write per
+# flush instead of one per voter. Deltas still pending when a process dies
+# are lost; recount_engagement repairs the drift. comment_count is not
+# buffered; core.signals writes it in the comment's transaction.
+COUNTER_BUFFER_MAX_PENDING = getattr(settings, 'COUNTER_BUFFER_MAX_PENDING', 500)
+COUNTER_BUFFER_FLUSH_SECONDS = getattr(settings, 'COUNTER_BUFFER_FLUSH_SECONDS', 2.0)
+
+
+def shifted(field, delta):
+    # Expression adding delta to an unsigned counter column
+    if delta > 0:
+        return F(field) + delta
+    # Clamp at zero instead of failing on drifted rows
+    return Case(When(**{f'{field}__gte': -delta}, then=F(field) + delta), default=0)
+
+
+def _count_subquery(model, parent_field, **filters):
+    rows = (
+        model.objects.filter(**{parent_field: OuterRef('pk')}, **filters)
+        .order_by()
+        .values(parent_field)
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    return Coalesce(Subquery(rows, output_field=IntegerField()), Value(0))
+
+
+def recount_engagement():
+    # Re-derive like/dislike/comment counters and the categories' tutorial
+    # counts from the source tables. One UPDATE per parent table, so drift
+    # can be repaired in bulk.
+    updated = {}
+    with transaction.atomic():
+        for model, parent_field in ((Blog, 'blog'), (Tutorial, 'tutorial')):
+            updated[model.__name__] = model.objects.update(
+                like_count=_count_subquery(LikeDislike, parent_field, is_like=True),
+                dislike_count=_count_subquery(LikeDislike, parent_field, is_like=False),
+                comment_count=_count_subquery(Comment, parent_field),
+            )
+        updated[Category.__name__] = Category.objects.update(
+            tutorial_count=_count_subquery(Tutorial, 'category'),
+        )
+    caching.bump('blogs', 'tutorials', 'categories')
+    return updated
+
+
+def apply_deltas(model, rows):
+    # rows maps pk -> {field: delta}; one UPDATE with a CASE per field
+    fields = {field for deltas in rows.values() for field in deltas}
+    updates = {}
+    for field in fields:
+        whens = [
+            When(pk=pk, then=shifted(field, deltas[field]))
+            for pk, deltas in rows.items() if deltas.get(field)
+        ]
+        if whens:
+            updates[field] = Case(*whens, default=F(field), output_field=model._meta.get_field(field))
+    if not updates:
+        return 0
+    return model.objects.filter(pk__in=sorted(rows)).update(**updates)
+
+
+class CounterBuffer:
+    """
+    Thread-safe accumulator of counter deltas for Blog/Tutorial rows and
+    trending engagement, flushed in batches (see COUNTER_BUFFER_*).
+    """
+
+    def __init__(self, max_pending=COUNTER_BUFFER_MAX_PENDING, flush_seconds=COUNTER_BUFFER_FLUSH_SECONDS):
+        self.max_pending = max_pending
+        self.flush_seconds = flush_seconds
+        self._lock = threading.Lock()
+        self._rows = {}
+        self._engagement = {}
+        self._timer = None
+
+    def add(self, model, pk, engagement=0, **deltas):
+        if not self.flush_seconds:
+            # Buffering disabled: write through
+            self._write({model: {pk: deltas}}, {pk: engagement} if engagement and model is Blog else {})
+            return
+        with self._lock:
+            pending = self._rows.setdefault(model, {}).setdefault(pk, {})
+            for field, delta in deltas.items():
+                pending[field] = pending.get(field, 0) + delta
+            if engagement and model is Blog:
+                self._engagement[pk] = self._engagement.get(pk, 0) + engagement
+            full = sum(len(rows) for rows in self._rows.values()) >= self.max_pending
+            if not full:
+                self._arm()
+        if full:
+            self.flush()
+
+    def _arm(self):
+        # Schedule a timed flush unless one is pending; call with the lock held
+        if self._timer is None:
+            self._timer = threading.Timer(self.flush_seconds, self._timed_flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def add_on_commit(self, instance, engagement=0, **deltas):
+        # Deltas of a LikeDislike/Comment-like row, counted once its transaction commits
+        deltas = {field: delta for field, delta in deltas.items() if delta}
+        if not deltas and not engagement:
+            return
+        targets = []
+        if instance.blog_id:
+            targets.append((Blog, instance.blog_id))
+        if instance.tutorial_id:
+            targets.append((Tutorial, instance.tutorial_id))
+
+        def add():
+            for model, pk in targets:
+                self.add(model, pk, engagement=engagement, **deltas)
+        transaction.on_commit(add)
+
+    def pending(self, model, pk):
+        with self._lock:
+            return dict(self._rows.get(model, {}).get(pk, {}))
+
+    def flush(self):
+        with self._lock:
+            rows, self._rows = self._rows, {}
+            engagement, self._engagement = self._engagement, {}
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if not rows and not engagement:
+            return 0
+        try:
+            self._write(rows, engagement)
+        except DatabaseError:
+            logger.exception("Could not flush counter deltas; keeping them for the next flush")
+            with self._lock:
+                for model, pending_rows in rows.items():
+                    for pk, deltas in pending_rows.items():
+                        pending = self._rows.setdefault(model, {}).setdefault(pk, {})
+                        for field, delta in deltas.items():
+                            pending[field] = pending.get(field, 0) + delta
+                for pk, delta in engagement.items():
+                    self._engagement[pk] = self._engagement.get(pk, 0) + delta
+                # Retry on the timer rather than waiting for the next add()
+                self._arm()
+            return 0
+        return sum(len(pending_rows) for pending_rows in rows.values())
+
+    def _write(self, rows, engagement):
+        with transaction.atomic():
+            for model, pending_rows in rows.items():
+                apply_deltas(model, pending_rows)
+            trending.bump_many(engagement)
+        # Cached pages show these counters; they must not outlive the flush
+        caching.bump('votes')
+
+    def _timed_flush(self):
+        close_old_connections()
+        try:
+            with self._lock:
+                self._timer = None
+            self.flush()
+        finally:
+            connections.close_all()
+
+
+buffer = CounterBuffer()
+atexit.register(buffer.flush)
@@ -0,0 +1,207 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from . import caching, jobs, rendering, trending
+from .models import Blog, Follow, TimelineEntry, Tutorial, User
+from .pagination import KeysetPaginator
+
+# Feeds are precomputed: publishing a blog or tutorial writes one
+# TimelineEntry per reader (the author and their followers), so reading a
+# feed is a keyset seek on the reader's own rows instead of a join across
+# follows, posts and scores. Fan-out runs as a background job (core.jobs);
+# refresh() merges trending posts in and trims old rows. Each of these
+# bumps the 'timelines' cache generation once its rows are written.
+FEED_PAGE_SIZE = getattr(settings, 'FEED_PAGE_SIZE', 10)
+FEED_MAX_ENTRIES = getattr(settings, 'FEED_MAX_ENTRIES', 500)
+FEED_RETENTION_DAYS = getattr(settings, 'FEED_RETENTION_DAYS', 90)
+FEED_TRENDING_ENTRIES = getattr(settings, 'FEED_TRENDING_ENTRIES', 10)
+FEED_REBUILD_INTERVAL = getattr(settings, 'FEED_REBUILD_INTERVAL', 3600)
+FEED_ORDERING = ('-created_at', '-id')
+
+MODELS = {'blog': Blog, 'tutorial': Tutorial}
+
+
+def _entries(kind, rows, user_ids, reason):
+    # rows are (id, created_at) pairs of the given kind
+    for user_id in user_ids:
+        for object_id, created_at in rows:
+            yield TimelineEntry(user_id=user_id, reason=reason, created_at=created_at,
+                                **{f'{kind}_id': object_id})
+
+
+def _insert(entries, batch_size=1000):
+    # Rows already in a timeline are left alone, so every step is idempotent
+    batch = []
+    total = 0
+    for entry in entries:
+        batch.append(entry)
+        if len(batch) >= batch_size:
+            TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+            total += len(batch)
+            batch = []
+    if batch:
+        TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+        total += len(batch)
+    return total
+
+
+@jobs.task
+def fan_out(kind, object_id, batch_size=1000):
+    # Place a new blog or tutorial in its author's and their followers' timelines
+    row = MODELS[kind].objects.filter(pk=object_id).values_list('author_id', 'created_at').first()
+    if row is None:
+        return 0
+    author_id, created_at = row
+    total = _insert(_entries(kind, [(object_id, created_at)], [author_id], 'own'))
+    followers = (
+        Follow.objects.filter(author_id=author_id)
+        .values_list('follower_id', flat=True)
+        .iterator(chunk_size=batch_size)
+    )
+    total += _insert(_entries(kind, [(object_id, created_at)], followers, 'following'), batch_size)
+    caching.bump('timelines')
+    return total
+
+
+def enqueue_fan_out(kind, object_id):
+    jobs.enqueue(fan_out, kind, object_id, key=f"feeds.fan_out:{kind}:{object_id}")
+
+
+def _recent(kind, author_ids, limit=None):
+    rows = (
+        MODELS[kind].objects.filter(author_id__in=author_ids)
+        .order_by('-created_at', '-id').values_list('id', 'created_at')
+    )
+    return list(rows[:limit or FEED_MAX_ENTRIES])
+
+
+def add_author(user_id, author_id):
+    # A new follow: pull the author's recent posts into the follower's timeline
+    total = 0
+    for kind in MODELS:
+        total += _insert(_entries(kind, _recent(kind, [author_id]), [user_id], 'following'))
+    return total
+
+
+def remove_author(user_id, author_id):
+    # An unfollow: drop what the follow brought in, keep trending picks
+    return TimelineEntry.objects.filter(
+        Q(blog__author_id=author_id) | Q(tutorial__author_id=author_id),
+        user_id=user_id, reason='following',
+    ).delete()[0]
+
+
+@jobs.task
+def sync_follow(user_id, author_id):
+    # Runs after a follow or unfollow; checks the current state, so jobs
+    # for quick follow/unfollow sequences may run in any order
+    if Follow.objects.filter(follower_id=user_id, author_id=author_id).exists():
+        changed = add_author(user_id, author_id)
+    else:
+        changed = remove_author(user_id, author_id)
+    caching.bump('timelines')
+    return changed
+
+
+def _trending_rows():
+    return [(blog.id, blog.created_at) for blog in trending.top_blogs(FEED_TRENDING_ENTRIES)]
+
+
+def rebuild_user(user_id):
+    # Build one timeline from scratch: own posts, followed authors, trending
+    TimelineEntry.objects.filter(user_id=user_id).delete()
+    authors = list(Follow.objects.filter(follower_id=user_id).values_list('author_id', flat=True))
+    total = 0
+    for kind in MODELS:
+        total += _insert(_entries(kind, _recent(kind, [user_id]), [user_id], 'own'))
+        total += _insert(_entries(kind, _recent(kind, authors), [user_id], 'following'))
+    total += _insert(_entries('blog', _trending_rows(), [user_id], 'trending'))
+    return total
+
+
+def merge_trending(batch_size=1000):
+    # Add the current top trending blogs to every active user's timeline
+    rows = _trending_rows()
+    if not rows:
+        return 0
+    users = (
+        User.objects.filter(is_active=True).order_by('pk')
+        .values_list('pk', flat=True).iterator(chunk_size=batch_size)
+    )
+    return _insert(_entries('blog', rows, users, 'trending'), batch_size)
+
+
+def trim(max_entries=None, retention_days=None):
+    # Drop entries past the retention window, then cap each timeline's length
+    max_entries = max_entries or FEED_MAX_ENTRIES
+    retention_days = retention_days or FEED_RETENTION_DAYS
+    cutoff = timezone.now() - timedelta(days=retention_days)
+    removed = TimelineEntry.objects.filter(created_at__lt=cutoff).delete()[0]
+    overfull = (
+        TimelineEntry.objects.values('user_id').annotate(entries=Count('id'))
+        .filter(entries__gt=max_entries).values_list('user_id', flat=True)
+    )
+    for user_id in overfull:
+        timeline = TimelineEntry.objects.filter(user_id=user_id)
+        oldest_kept = timeline.order_by(*FEED_ORDERING).values_list('created_at', 'id')[max_entries - 1]
+        removed += timeline.filter(created_at__lt=oldest_kept[0]).delete()[0]
+        removed += timeline.filter(created_at=oldest_kept[0], id__lt=oldest_kept[1]).delete()[0]
+    return removed
+
+
+def refresh():
+    # Periodic maintenance, run by the refresh_feeds command
+    merged = merge_trending()
+    removed = trim()
+    caching.bump('timelines')
+    return merged, removed
+
+
+def rebuild_all():
+    total = 0
+    for user_id in User.objects.order_by('pk').values_list('pk', flat=True).iterator():
+        total += rebuild_user(user_id)
+    caching.bump('timelines')
+    return total
+
+
+def _claim_rebuild(user_id):
+    # True for at most one read per user every FEED_REBUILD_INTERVAL seconds,
+    # so a timeline that is empty because there is nothing to show isn't
+    # rebuilt on every visit
+    key = f"core:feeds:rebuilt:{user_id}"
+    return caching.get_cache().add(key, 1, timeout=FEED_REBUILD_INTERVAL)
+
+
+def timeline_page(user, cursor=None):
+    # One page of a user's feed; a timeline that was never built (accounts
+    # older than this feature, or with nothing followed yet) is built on first read
+    paginator = KeysetPaginator(
+        TimelineEntry.objects.filter(user=user)
+        .select_related('blog__author', 'tutorial__author')
+        .defer(*(f'{kind}__{field}' for kind in MODELS for field in rendering.LISTING_DEFERRED)),
+        FEED_PAGE_SIZE,
+        ordering=FEED_ORDERING,
+    )
+    page = paginator.get_page(cursor)
+    if not page.object_list and not cursor and _claim_rebuild(user.id) and rebuild_user(user.id):
+        page = paginator.get_page(cursor)
+    page.entries = page.object_list
+    return page
+
+
+def latest_page(cursor=None):
+    # The feed for visitors without a timeline: newest blogs first, wrapped in
+    # unsaved entries so the template renders both feeds the same way
+    paginator = KeysetPaginator(
+        Blog.objects.select_related('author').defer(*rendering.LISTING_DEFERRED),
+        FEED_PAGE_SIZE, ordering=FEED_ORDERING,
+    )
+    page = paginator.get_page(cursor)
+    page.entries = [
+        TimelineEntry(blog=blog, reason='', created_at=blog.created_at) for blog in page
+    ]
+    return page
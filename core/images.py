@@ -0,0 +1,132 @@
+from io import BytesIO
+
+from django.apps import apps
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+from . import jobs
+
+# Derivative widths in pixels; images are never upscaled
+VARIANTS = {
+    'thumb': 160,
+    'card': 640,
+    'full': 1280,
+}
+# Derivatives live under this prefix, in a directory named after the full
+# path of their original, so no upload name can look like a derivative
+VARIANTS_DIR = 'variants'
+# (extension, Pillow format, save options); WebP first, JPEG as the fallback
+FORMATS = [
+    ('webp', 'WEBP', {'quality': 80, 'method': 6}),
+    ('jpg', 'JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+]
+
+# Image field of each model whose uploads get variants
+IMAGE_FIELDS = {
+    'core.blog': 'image',
+    'core.profile': 'profile_picture',
+}
+
+_known_variants = set()
+_original_widths = {}
+
+EXIF_ORIENTATION = 0x0112
+
+
+def variant_name(name, variant, extension):
+    # blog_images/photo.jpg -> variants/blog_images/photo.jpg/card.webp
+    return f"{VARIANTS_DIR}/{name}/{variant}.{extension}"
+
+
+def is_variant(name):
+    # Uploads are stored under their model's upload_to, never in VARIANTS_DIR
+    return name.startswith(f"{VARIANTS_DIR}/")
+
+
+def has_variants(field_file):
+    # Checks the largest JPEG only; all variants are written together
+    name = variant_name(field_file.name, 'full', 'jpg')
+    if name in _known_variants:
+        return True
+    if field_file.storage.exists(name):
+        _known_variants.add(name)
+        return True
+    return False
+
+
+def original_width(field_file):
+    # Width of the upload as displayed (after EXIF rotation), read from the
+    # file's header once per process
+    name = field_file.name
+    if name not in _original_widths:
+        with field_file.storage.open(name, 'rb') as source:
+            image = Image.open(source)
+            width, height = image.size
+            if image.getexif().get(EXIF_ORIENTATION) in (5, 6, 7, 8):
+                width = height
+        _original_widths[name] = width
+    return _original_widths[name]
+
+
+def variant_widths(field_file):
+    # (variant, actual width) of each distinct derivative: variants wider
+    # than the original hold the original size, so only the first is listed
+    limit = original_width(field_file)
+    widths = []
+    for variant, width in VARIANTS.items():
+        widths.append((variant, min(width, limit)))
+        if width >= limit:
+            break
+    return widths
+
+
+def generate_variants(field_file, force=False):
+    # Write every size/format derivative of an uploaded image next to it
+    if not field_file or is_variant(field_file.name):
+        return []
+    if not force and has_variants(field_file):
+        return []
+
+    storage = field_file.storage
+    with storage.open(field_file.name, 'rb') as source:
+        original = ImageOps.exif_transpose(Image.open(source))
+        original.load()
+    if original.mode not in ('RGB', 'L'):
+        original = original.convert('RGB')
+    _original_widths[field_file.name] = original.width
+
+    written = []
+    for variant, width in VARIANTS.items():
+        image = original
+        if image.width > width:
+            height = round(image.height * width / image.width)
+            image = image.resize((width, height), Image.LANCZOS)
+        for extension, image_format, options in FORMATS:
+            buffer = BytesIO()
+            image.save(buffer, image_format, **options)
+            name = variant_name(field_file.name, variant, extension)
+            # Deterministic names: replace rather than let storage add a suffix
+            if storage.exists(name):
+                storage.delete(name)
+            written.append(storage.save(name, ContentFile(buffer.getvalue())))
+    _known_variants.add(variant_name(field_file.name, 'full', 'jpg'))
+    return written
+
+
+@jobs.task
+def generate_variants_for(model_label, pk):
+    # Job queued by core.signals for a new upload; reads the current file,
+    # so a job for a replaced image handles the replacement
+    field = IMAGE_FIELDS[model_label]
+    instance = apps.get_model(model_label).objects.filter(pk=pk).only(field).first()
+    if instance is None:
+        return []
+    return generate_variants(getattr(instance, field))
+
+
+def variant_urls(field_file, extension):
+    storage = field_file.storage
+    return [
+        (storage.url(variant_name(field_file.name, variant, extension)), width)
+        for variant, width in variant_widths(field_file)
+    ]
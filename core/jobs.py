@@ -0,0 +1,199 @@
+import logging
+import os
+import random
+import socket
+import threading
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connections, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+# Work that does not have to finish before a response is sent is stored as a
+# Job row in the caller's transaction, so it exists exactly when the change
+# that produced it commits, and is run by `manage.py run_jobs` workers.
+# Failed attempts are retried with exponential backoff; a job whose worker
+# died is handed out again after JOBS_TIMEOUT_SECONDS. Tasks must therefore
+# be idempotent, and should read current state rather than trust arguments
+# captured at enqueue time.
+JOBS_EAGER = getattr(settings, 'JOBS_EAGER', False)
+JOBS_MAX_ATTEMPTS = getattr(settings, 'JOBS_MAX_ATTEMPTS', 5)
+JOBS_BACKOFF_SECONDS = getattr(settings, 'JOBS_BACKOFF_SECONDS', 10)
+JOBS_BACKOFF_MAX_SECONDS = getattr(settings, 'JOBS_BACKOFF_MAX_SECONDS', 3600)
+JOBS_TIMEOUT_SECONDS = getattr(settings, 'JOBS_TIMEOUT_SECONDS', 600)
+JOBS_RETENTION_DAYS = getattr(settings, 'JOBS_RETENTION_DAYS', 7)
+
+_tasks = {}
+
+
+def task(func=None, *, max_attempts=None):
+    """
+    Register a function as a job task, under its dotted path. The function
+    itself is unchanged; queue it with enqueue(func, *args).
+    """
+    def register(func):
+        func.job_name = f"{func.__module__}.{func.__qualname__}"
+        func.job_max_attempts = max_attempts or JOBS_MAX_ATTEMPTS
+        _tasks[func.job_name] = func
+        return func
+    return register(func) if func is not None else register
+
+
+def get_task(name):
+    func = _tasks.get(name)
+    if func is None:
+        # Workers may not have imported the task's module yet
+        func = import_string(name)
+        if getattr(func, 'job_name', None) != name:
+            raise ValueError(f"{name} is not a registered task.")
+    return func
+
+
+def enqueue(func, *args, key=None, delay=None, **kwargs):
+    """
+    Queue func(*args, **kwargs). Arguments must be JSON-serializable. With
+    an idempotency `key`, enqueueing again while a job with that key exists
+    (in any state, until it is purged) is a no-op. Returns the saved Job
+    for unkeyed jobs, None otherwise.
+    """
+    name = func.job_name
+    if JOBS_EAGER:
+        transaction.on_commit(lambda: func(*args, **kwargs))
+        return None
+    job = Job(
+        task=name,
+        args=list(args),
+        kwargs=kwargs,
+        idempotency_key=key,
+        max_attempts=func.job_max_attempts,
+        run_after=timezone.now() + (delay or timedelta()),
+    )
+    if key is None:
+        job.save()
+        return job
+    Job.objects.bulk_create([job], ignore_conflicts=True)
+    return None
+
+
+def backoff(attempts):
+    # 10s, 20s, 40s, ... capped, with jitter so failed batches spread out
+    seconds = min(JOBS_BACKOFF_SECONDS * 2 ** max(attempts - 1, 0), JOBS_BACKOFF_MAX_SECONDS)
+    return timedelta(seconds=seconds * random.uniform(1, 1.25))
+
+
+def claim(worker_name):
+    # Take the oldest due job. SKIP LOCKED lets concurrent workers pass over
+    # rows another worker is claiming; the status filter on the UPDATE keeps
+    # the claim safe on backends without it.
+    now = timezone.now()
+    with transaction.atomic():
+        job_id = (
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(status='queued', run_after__lte=now)
+            .order_by('run_after', 'id')
+            .values_list('id', flat=True)
+            .first()
+        )
+        if job_id is None:
+            return None
+        claimed = Job.objects.filter(pk=job_id, status='queued').update(
+            status='running', locked_by=worker_name, started_at=now, attempts=F('attempts') + 1,
+        )
+    if not claimed:
+        return None
+    return Job.objects.get(pk=job_id)
+
+
+def execute(job):
+    # Run a claimed job and record the outcome; never raises
+    try:
+        func = get_task(job.task)
+        func(*job.args, **job.kwargs)
+    except Exception:
+        error = traceback.format_exc()
+        if job.attempts < job.max_attempts:
+            logger.warning("Job %s failed (attempt %d/%d), retrying", job, job.attempts, job.max_attempts)
+            Job.objects.filter(pk=job.pk).update(
+                status='queued', run_after=timezone.now() + backoff(job.attempts),
+                last_error=error, locked_by='',
+            )
+        else:
+            logger.error("Job %s failed permanently after %d attempts", job, job.attempts)
+            Job.objects.filter(pk=job.pk).update(
+                status='failed', finished_at=timezone.now(), last_error=error, locked_by='',
+            )
+        return False
+    Job.objects.filter(pk=job.pk).update(status='succeeded', finished_at=timezone.now(), locked_by='')
+    return True
+
+
+def requeue_stale():
+    # Jobs left 'running' by a worker that died or hung past the timeout
+    cutoff = timezone.now() - timedelta(seconds=JOBS_TIMEOUT_SECONDS)
+    stale = Job.objects.filter(status='running', started_at__lt=cutoff)
+    error = "Worker stopped responding; requeued."
+    failed = stale.filter(attempts__gte=F('max_attempts')).update(
+        status='failed', finished_at=timezone.now(), last_error=error, locked_by='',
+    )
+    requeued = stale.update(status='queued', run_after=timezone.now(), last_error=error, locked_by='')
+    return requeued + failed
+
+
+def retry(job_id):
+    # Put a failed job back in the queue with a fresh set of attempts
+    return Job.objects.filter(pk=job_id, status='failed').update(
+        status='queued', attempts=0, run_after=timezone.now(), finished_at=None,
+    )
+
+
+def purge(days=None):
+    # Finished jobs are kept for a while so their idempotency keys hold
+    cutoff = timezone.now() - timedelta(days=days or JOBS_RETENTION_DAYS)
+    return Job.objects.filter(status__in=('succeeded', 'failed'), finished_at__lt=cutoff).delete()[0]
+
+
+def worker_name(index=0):
+    return f"{socket.gethostname()}:{os.getpid()}:{index}"
+
+
+class Worker:
+    """
+    Claims and runs jobs one at a time until stopped. Several workers may
+    run in threads of one process or in separate processes and hosts.
+    """
+
+    maintenance_interval = 60
+
+    def __init__(self, name, poll_interval=1.0, burst=False, stop_event=None):
+        self.name = name
+        self.poll_interval = poll_interval
+        self.burst = burst
+        self.stop_event = stop_event or threading.Event()
+        self.processed = 0
+
+    def run(self):
+        last_maintenance = None
+        while not self.stop_event.is_set():
+            close_old_connections()
+            now = timezone.now()
+            if last_maintenance is None or (now - last_maintenance).total_seconds() >= self.maintenance_interval:
+                requeue_stale()
+                purge()
+                last_maintenance = now
+            job = claim(self.name)
+            if job is None:
+                if self.burst:
+                    break
+                self.stop_event.wait(self.poll_interval)
+                continue
+            execute(job)
+            self.processed += 1
+        connections.close_all()
+        return self.processed
@@ -0,0 +1,73 @@
+import json
+import subprocess
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.utils import timezone
+
+from core.benchmarks import SKIPPED_ROUTES, measure, over_budget, seed_dataset, unexpected_status
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway test database and record query count, SQL time and "
+        "wall-clock time for every core route, writing a JSON report."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default='benchmark-report.json', help="Where to write the JSON report.")
+        parser.add_argument('--scale', type=int, default=1, help="Multiplier for the seeded dataset size.")
+        parser.add_argument('--repeat', type=int, default=5, help="Requests per route; timings are medians.")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--no-fail', action='store_true', help="Do not exit non-zero when a budget is exceeded.")
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        # Never seed into the configured database; use a test database like the test runner does
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            data = seed_dataset(scale=options['scale'], seed=options['seed'])
+            results = measure(data, repeat=options['repeat'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        report = {
+            'generated_at': timezone.now().isoformat(),
+            'commit': self._commit(),
+            'database': connection.vendor,
+            'scale': options['scale'],
+            'repeat': options['repeat'],
+            'skipped': SKIPPED_ROUTES,
+            'routes': results,
+        }
+        with open(options['output'], 'w') as handle:
+            json.dump(report, handle, indent=2)
+
+        for result in results:
+            marker = '!!' if result['queries'] > result['budget'] or unexpected_status([result]) else '  '
+            self.stdout.write(
+                f"{marker} {result['method']:4} {result['path']:40} {result['status']} "
+                f"queries={result['queries']:3}/{result['budget']:<3} "
+                f"sql={result['sql_ms']:7.2f}ms wall={result['wall_ms']:7.2f}ms"
+            )
+        self.stdout.write(f"Report written to {options['output']}")
+
+        failures = over_budget(results)
+        if failures and not options['no_fail']:
+            raise CommandError(f"{len(failures)} route(s) exceeded their query budget.")
+        wrong = unexpected_status(results)
+        if wrong and not options['no_fail']:
+            raise CommandError(f"{len(wrong)} route(s) returned an unexpected status.")
+
+    def _commit(self):
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', 'HEAD'], cwd=settings.BASE_DIR,
+                capture_output=True, text=True, check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
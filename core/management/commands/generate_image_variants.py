@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from core.images import generate_variants
+from core.models import Blog, Profile
+
+
+class Command(BaseCommand):
+    help = "Generate resized WebP/JPEG variants for blog images and profile pictures."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help="Regenerate variants that already exist.")
+
+    def handle(self, *args, **options):
+        sources = (
+            (Blog.objects.exclude(image='').exclude(image__isnull=True), 'image'),
+            (Profile.objects.exclude(profile_picture='').exclude(profile_picture__isnull=True), 'profile_picture'),
+        )
+        total = 0
+        failed = 0
+        for queryset, field in sources:
+            for obj in queryset.only('pk', field).iterator():
+                field_file = getattr(obj, field)
+                try:
+                    written = generate_variants(field_file, force=options['force'])
+                except (OSError, ValueError) as exc:
+                    failed += 1
+                    self.stderr.write(f"Skipping {field_file.name}: {exc}")
+                    continue
+                if written:
+                    total += 1
+                    self.stdout.write(f"Generated {len(written)} variants for {field_file.name}")
+        self.stdout.write(self.style.SUCCESS(f"Processed {total} images ({failed} failed)."))
@@ -0,0 +1,94 @@
+import argparse
+import time
+from datetime import datetime, timezone
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.synthetic import DEFAULT_END, SyntheticDataset
+
+
+def moment(value):
+    # ISO date or datetime; naive values are taken as UTC
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"{value!r} is not an ISO date or datetime.")
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate deterministic synthetic users, profiles, posts, engagement and "
+        "mentorship chats for load testing. Example for roughly 10M rows: "
+        "--users 200000 --blogs 400000 --tutorials 100000 --comments 4000000 "
+        "--votes 3000000 --chats 150000 --messages 1500000 --follows 1000000 --skip-search --skip-feeds"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--mentors', type=int, default=20, help="How many of the users are staff mentors.")
+        parser.add_argument('--blogs', type=int, default=2000)
+        parser.add_argument('--tutorials', type=int, default=500)
+        parser.add_argument('--comments', type=int, default=20000)
+        parser.add_argument('--votes', type=int, default=20000)
+        parser.add_argument('--chats', type=int, default=800, help="Chats, one per member/mentor pair.")
+        parser.add_argument('--messages', type=int, default=10000)
+        parser.add_argument('--follows', type=int, default=5000, help="Follower/author pairs feeding the timelines.")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--skew', type=float, default=1.1,
+            help="Zipf exponent for authors, comment/vote targets and chat length; 0 is uniform.",
+        )
+        parser.add_argument('--days', type=int, default=365, help="Spread timestamps over this many days before --end.")
+        parser.add_argument(
+            '--end', type=moment, default=DEFAULT_END,
+            help=f"Latest generated timestamp (default {DEFAULT_END.date()}, fixed so a seed is reproducible).",
+        )
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--prefix', default='synthetic', help="Username/email prefix of generated accounts.")
+        parser.add_argument('--password', default='synthetic', help="Password of every generated account.")
+        parser.add_argument(
+            '--skip-feeds', action='store_true',
+            help="Do not rebuild user timelines (run refresh_feeds --rebuild later).",
+        )
+        parser.add_argument(
+            '--skip-search', action='store_true',
+            help="Do not rebuild the search index (slow for large datasets; run rebuild_search_index later).",
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        dataset = SyntheticDataset(
+            users=options['users'],
+            mentors=options['mentors'],
+            blogs=options['blogs'],
+            tutorials=options['tutorials'],
+            comments=options['comments'],
+            votes=options['votes'],
+            chats=options['chats'],
+            messages=options['messages'],
+            follows=options['follows'],
+            seed=options['seed'],
+            skew=options['skew'],
+            days=options['days'],
+            end=options['end'],
+            batch_size=options['batch_size'],
+            prefix=options['prefix'],
+            password=options['password'],
+            log=self._log(started),
+        )
+        try:
+            dataset.generate()
+        except ValueError as error:
+            raise CommandError(str(error))
+        dataset.rebuild_derived(
+            include_search=not options['skip_search'], include_feeds=not options['skip_feeds'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Synthetic dataset generated in {time.perf_counter() - started:.1f}s."
+        ))
+
+    def _log(self, started):
+        def log(message):
+            self.stdout.write(f"[{time.perf_counter() - started:7.1f}s] {message}")
+        return log
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from core.snapshots import rebuild_all
+
+
+class Command(BaseCommand):
+    help = "Rebuild the denormalized snapshot of every journalist profile."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        total = rebuild_all(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {total} profile snapshots."))
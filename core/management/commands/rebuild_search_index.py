@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from core.search import rebuild
+
+
+class Command(BaseCommand):
+    help = "Rebuild the search index for blogs, tutorials and profiles."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        total = rebuild(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Indexed {total} documents."))
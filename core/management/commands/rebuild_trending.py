@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from core.counters import recount_engagement
+from core.trending import rebuild
+
+
+class Command(BaseCommand):
+    help = "Rebuild the trending scores of all blog posts from their engagement counters."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--recount',
+            action='store_true',
+            help="Recount likes and comments from source tables before rebuilding.",
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        if options['recount']:
+            recount_engagement()
+        total = rebuild(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt trending scores for {total} posts."))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from core.unread import reconcile
+
+
+class Command(BaseCommand):
+    help = "Recompute every user's unread mentorship message counter."
+
+    def handle(self, *args, **options):
+        updated = reconcile()
+        self.stdout.write(self.style.SUCCESS(f"Reconciled unread counters for {updated} users."))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from core.counters import recount_engagement
+
+
+class Command(BaseCommand):
+    help = "Recompute like, dislike and comment counters on blogs and tutorials, and tutorial counts on categories."
+
+    def handle(self, *args, **options):
+        updated = recount_engagement()
+        for model_name, rows in updated.items():
+            self.stdout.write(f"{model_name}: {rows} rows recounted")
+        self.stdout.write(self.style.SUCCESS("Engagement counters are up to date."))
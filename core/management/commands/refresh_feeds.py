@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from core import feeds
+
+
+class Command(BaseCommand):
+    help = "Merge trending posts into user timelines and trim old entries; --rebuild rebuilds every timeline."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild', action='store_true',
+                            help="Rebuild every timeline from follows, own posts and trending first.")
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            total = feeds.rebuild_all()
+            self.stdout.write(f"Rebuilt timelines with {total} entries.")
+        merged, removed = feeds.refresh()
+        self.stdout.write(self.style.SUCCESS(
+            f"Merged {merged} trending entries, trimmed {removed} old entries."
+        ))
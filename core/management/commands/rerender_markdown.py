@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from core.rendering import RENDERER_VERSION, rerender_all
+
+
+class Command(BaseCommand):
+    help = (
+        "Render the Markdown content of blogs and tutorials whose stored HTML, excerpt or "
+        "reading time is missing or outdated. Run after deploying a new renderer version."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help="Re-render every row, stale or not.")
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        total = rerender_all(force=options['force'], batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Rendered {total} blogs and tutorials with renderer version {RENDERER_VERSION}."
+        ))
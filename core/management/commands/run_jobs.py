@@ -0,0 +1,80 @@
+import multiprocessing
+import signal
+import threading
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from core import jobs
+
+
+def _process_main(index, poll_interval, burst):
+    # Entry point of a worker process; a spawned child has to set Django up
+    django.setup()
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *args: stop.set())
+    signal.signal(signal.SIGINT, lambda *args: stop.set())
+    jobs.Worker(jobs.worker_name(index), poll_interval, burst, stop).run()
+
+
+class Command(BaseCommand):
+    help = "Run background job workers (core.jobs) until interrupted, or until the queue is empty with --burst."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=1, help="Number of workers.")
+        parser.add_argument(
+            '--mode', choices=('threads', 'processes'), default='threads',
+            help="Run workers as threads of this process or as separate processes.",
+        )
+        parser.add_argument('--poll-interval', type=float, default=1.0, help="Seconds to wait when the queue is empty.")
+        parser.add_argument('--burst', action='store_true', help="Exit once no job is due.")
+
+    def handle(self, *args, **options):
+        concurrency = options['concurrency']
+        if concurrency < 1:
+            raise CommandError("--concurrency must be at least 1.")
+        self.stdout.write(f"Starting {concurrency} worker(s) in {options['mode']} mode.")
+        if options['mode'] == 'processes':
+            self._run_processes(concurrency, options['poll_interval'], options['burst'])
+        else:
+            self._run_threads(concurrency, options['poll_interval'], options['burst'])
+        self.stdout.write(self.style.SUCCESS("Workers stopped."))
+
+    def _run_threads(self, concurrency, poll_interval, burst):
+        stop = threading.Event()
+        workers = [
+            jobs.Worker(jobs.worker_name(index), poll_interval, burst, stop) for index in range(concurrency)
+        ]
+        threads = [threading.Thread(target=worker.run, name=worker.name) for worker in workers]
+        for thread in threads:
+            thread.start()
+        try:
+            for thread in threads:
+                while thread.is_alive():
+                    thread.join(0.5)
+        except KeyboardInterrupt:
+            self.stdout.write("Stopping after the current jobs...")
+            stop.set()
+            for thread in threads:
+                thread.join()
+        self.stdout.write(f"Processed {sum(worker.processed for worker in workers)} job(s).")
+
+    def _run_processes(self, concurrency, poll_interval, burst):
+        # Children must not inherit this process's database connections
+        connections.close_all()
+        processes = [
+            multiprocessing.Process(target=_process_main, args=(index, poll_interval, burst))
+            for index in range(concurrency)
+        ]
+        for process in processes:
+            process.start()
+        try:
+            for process in processes:
+                process.join()
+        except KeyboardInterrupt:
+            self.stdout.write("Stopping after the current jobs...")
+            for process in processes:
+                process.terminate()
+            for process in processes:
+                process.join()
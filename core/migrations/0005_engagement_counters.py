@@ -0,0 +1,70 @@
+# Generated by Django 5.1.2 on 2026-10-18 15:19
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    Blog = apps.get_model('core', 'Blog')
+    Tutorial = apps.get_model('core', 'Tutorial')
+    Comment = apps.get_model('core', 'Comment')
+    LikeDislike = apps.get_model('core', 'LikeDislike')
+
+    def count_of(model, parent_field, **filters):
+        rows = (
+            model.objects.filter(**{parent_field: OuterRef('pk')}, **filters)
+            .order_by()
+            .values(parent_field)
+            .annotate(total=Count('pk'))
+            .values('total')
+        )
+        return Coalesce(Subquery(rows, output_field=IntegerField()), Value(0))
+
+    for model, parent_field in ((Blog, 'blog'), (Tutorial, 'tutorial')):
+        model.objects.update(
+            like_count=count_of(LikeDislike, parent_field, is_like=True),
+            dislike_count=count_of(LikeDislike, parent_field, is_like=False),
+            comment_count=count_of(Comment, parent_field),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_profile_facebook_profile_instagram_profile_linkedin_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blog',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='blog',
+            name='dislike_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='blog',
+            name='like_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='tutorial',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='tutorial',
+            name='dislike_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='tutorial',
+            name='like_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
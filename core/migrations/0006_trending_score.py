@@ -0,0 +1,46 @@
+# Generated by Django 5.1.2 on 2026-10-18 15:20
+
+import math
+from datetime import datetime, timezone as dt_timezone
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def backfill_scores(apps, schema_editor):
+    Blog = apps.get_model('core', 'Blog')
+    TrendingScore = apps.get_model('core', 'TrendingScore')
+    epoch = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+    rows = []
+    for blog in Blog.objects.all().iterator():
+        engagement = blog.like_count + blog.dislike_count + blog.comment_count
+        base = (blog.created_at - epoch).total_seconds() / 45000
+        rows.append(TrendingScore(
+            blog_id=blog.pk,
+            engagement=engagement,
+            base=base,
+            score=base + math.log10(max(engagement, 1)),
+        ))
+    TrendingScore.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_engagement_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendingScore',
+            fields=[
+                ('blog', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='trending', serialize=False, to='core.blog')),
+                ('engagement', models.IntegerField(default=0, help_text='Likes, dislikes and comments counted so far.')),
+                ('base', models.FloatField(default=0, help_text='Time-decay component derived from the publish date.')),
+                ('score', models.FloatField(db_index=True, default=0)),
+                ('recomputed_at', models.DateTimeField(default=django.utils.timezone.now, help_text='When the score was last rebuilt from source.')),
+            ],
+        ),
+        migrations.RunPython(backfill_scores, migrations.RunPython.noop),
+    ]
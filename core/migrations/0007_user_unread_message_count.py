@@ -0,0 +1,40 @@
+# Generated by Django 5.1.2 on 2026-10-18 15:21
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_unread(apps, schema_editor):
+    User = apps.get_model('core', 'User')
+    MentorshipMessage = apps.get_model('core', 'MentorshipMessage')
+    rows = (
+        MentorshipMessage.objects.filter(
+            Q(chat__participant_one=OuterRef('pk')) | Q(chat__participant_two=OuterRef('pk')),
+            is_read=False,
+        )
+        .exclude(sender=OuterRef('pk'))
+        .order_by()
+        .values('is_read')
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    User.objects.update(
+        unread_message_count=Coalesce(Subquery(rows, output_field=IntegerField()), Value(0))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_trending_score'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='unread_message_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_unread, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.1.2 on 2026-10-18 15:22
+
+from django.db import migrations, models
+from django.db.models import Max, Min
+
+
+def backfill_read_cursors(apps, schema_editor):
+    # Place each cursor just below the participant's oldest unread message,
+    # or on the newest message when nothing is pending.
+    MentorshipChat = apps.get_model('core', 'MentorshipChat')
+    MentorshipMessage = apps.get_model('core', 'MentorshipMessage')
+    for chat in MentorshipChat.objects.all().iterator():
+        messages = MentorshipMessage.objects.filter(chat=chat)
+        newest = messages.aggregate(newest=Max('id'))['newest'] or 0
+        for participant_field, cursor_field in (
+            ('participant_one_id', 'participant_one_last_read'),
+            ('participant_two_id', 'participant_two_last_read'),
+        ):
+            oldest_unread = (
+                messages.filter(is_read=False)
+                .exclude(sender_id=getattr(chat, participant_field))
+                .aggregate(oldest=Min('id'))['oldest']
+            )
+            setattr(chat, cursor_field, oldest_unread - 1 if oldest_unread else newest)
+        chat.save(update_fields=['participant_one_last_read', 'participant_two_last_read'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_user_unread_message_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mentorshipchat',
+            name='participant_one_last_read',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='mentorshipchat',
+            name='participant_two_last_read',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_read_cursors, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='mentorshipmessage',
+            name='is_read',
+        ),
+        migrations.AddIndex(
+            model_name='mentorshipmessage',
+            index=models.Index(fields=['chat', 'id'], name='core_msg_chat_id_idx'),
+        ),
+    ]
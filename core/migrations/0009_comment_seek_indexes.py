@@ -0,0 +1,21 @@
+# Generated by Django 5.1.2 on 2026-10-18 15:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_chat_read_cursors'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['blog', 'created_at', 'id'], name='core_comment_blog_seek_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['tutorial', 'created_at', 'id'], name='core_comment_tut_seek_idx'),
+        ),
+    ]
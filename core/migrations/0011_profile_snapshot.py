@@ -0,0 +1,23 @@
+# Generated by Django 5.1.2 on 2026-10-18 15:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProfileSnapshot',
+            fields=[
+                ('profile', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='snapshot', serialize=False, to='core.profile')),
+                ('data', models.JSONField()),
+                ('version', models.PositiveSmallIntegerField(default=1, help_text='Layout version of data; older ones are rebuilt on read.')),
+                ('built_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
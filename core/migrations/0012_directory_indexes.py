@@ -0,0 +1,22 @@
+# Generated by Django 5.1.2 on 2026-10-18 15:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_profile_snapshot'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='profile',
+            name='location',
+            field=models.CharField(blank=True, db_index=True, help_text="User's current location.", max_length=255),
+        ),
+        migrations.AddIndex(
+            model_name='skill',
+            index=models.Index(fields=['name', 'profile'], name='core_skill_name_idx'),
+        ),
+    ]
@@ -0,0 +1,147 @@
+# Generated by Django 5.1.2 on 2026-10-18 15:40
+
+import logging
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F, Func, IntegerField, Max, Min, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+
+logger = logging.getLogger(__name__)
+
+
+def _merged_cursor(MentorshipMessage, chats, user_id, newest):
+    # Highest message id below which the user has read everything in the
+    # merged thread: just under the oldest message that was unread for them
+    # in whichever chat it came from
+    oldest_unread = None
+    for chat in chats:
+        if chat.participant_one_id == user_id:
+            cursor = chat.participant_one_last_read
+        else:
+            cursor = chat.participant_two_last_read
+        first = (
+            MentorshipMessage.objects.filter(chat=chat, id__gt=cursor)
+            .exclude(sender_id=user_id)
+            .aggregate(first=Min('id'))['first']
+        )
+        if first is not None and (oldest_unread is None or first < oldest_unread):
+            oldest_unread = first
+    return oldest_unread - 1 if oldest_unread is not None else newest
+
+
+def merge_duplicate_chats(apps, schema_editor):
+    # Fold A->B and B->A chats into one chat per unordered pair, stored with
+    # participant_one < participant_two. The oldest chat of a pair survives
+    # and the others' messages move into it; each participant's read cursor
+    # is recomputed so nothing they hadn't read in any of the chats is
+    # hidden. Chats with oneself have no canonical form: their messages are
+    # kept, detached from any chat (chat is nullable), and the chats removed.
+    MentorshipChat = apps.get_model('core', 'MentorshipChat')
+    MentorshipMessage = apps.get_model('core', 'MentorshipMessage')
+
+    groups = {}
+    for chat in MentorshipChat.objects.order_by('id').iterator():
+        pair = tuple(sorted((chat.participant_one_id, chat.participant_two_id)))
+        groups.setdefault(pair, []).append(chat)
+
+    for (low, high), chats in groups.items():
+        chat_ids = [chat.pk for chat in chats]
+        if low == high:
+            detached = MentorshipMessage.objects.filter(chat__in=chat_ids).update(chat=None)
+            MentorshipChat.objects.filter(pk__in=chat_ids).delete()
+            logger.warning(
+                "Removed self-chats %s of user %s; their %d messages were kept with no chat.",
+                chat_ids, low, detached,
+            )
+            continue
+        keeper, duplicates = chats[0], chats[1:]
+        if not duplicates and keeper.participant_one_id == low:
+            continue
+
+        if duplicates:
+            newest = MentorshipMessage.objects.filter(chat__in=chat_ids).aggregate(newest=Max('id'))['newest'] or 0
+            cursors = {user_id: _merged_cursor(MentorshipMessage, chats, user_id, newest) for user_id in (low, high)}
+        else:
+            cursors = {
+                keeper.participant_one_id: keeper.participant_one_last_read,
+                keeper.participant_two_id: keeper.participant_two_last_read,
+            }
+        latest = max(chats, key=lambda chat: chat.last_message_date)
+
+        if duplicates:
+            MentorshipMessage.objects.filter(chat__in=[chat.pk for chat in duplicates]).update(chat=keeper)
+            MentorshipChat.objects.filter(pk__in=[chat.pk for chat in duplicates]).delete()
+            logger.info("Merged chats %s of users %s and %s into chat %s.", chat_ids, low, high, keeper.pk)
+        # update() so last_message_date isn't overwritten by auto_now
+        MentorshipChat.objects.filter(pk=keeper.pk).update(
+            participant_one_id=low,
+            participant_two_id=high,
+            participant_one_last_read=cursors[low],
+            participant_two_last_read=cursors[high],
+            last_message=latest.last_message,
+            last_message_date=latest.last_message_date,
+        )
+
+
+def reconcile_unread(apps, schema_editor):
+    # Messages moved between chats change what counts as unread; rewrite
+    # every user's badge counter from the merged chats' read cursors
+    User = apps.get_model('core', 'User')
+    MentorshipMessage = apps.get_model('core', 'MentorshipMessage')
+    rows = (
+        MentorshipMessage.objects.filter(
+            Q(chat__participant_one=OuterRef('pk'), id__gt=F('chat__participant_one_last_read'))
+            | Q(chat__participant_two=OuterRef('pk'), id__gt=F('chat__participant_two_last_read'))
+        )
+        .exclude(sender=OuterRef('pk'))
+        .order_by()
+        .annotate(total=Func(F('id'), function='COUNT'))
+        .values('total')
+    )
+    User.objects.update(
+        unread_message_count=Coalesce(Subquery(rows, output_field=IntegerField()), Value(0))
+    )
+
+
+def create_memberships(apps, schema_editor):
+    MentorshipChat = apps.get_model('core', 'MentorshipChat')
+    ChatMember = apps.get_model('core', 'ChatMember')
+    rows = []
+    for chat_id, one, two in MentorshipChat.objects.values_list('id', 'participant_one_id', 'participant_two_id').iterator():
+        rows.append(ChatMember(chat_id=chat_id, user_id=one))
+        rows.append(ChatMember(chat_id=chat_id, user_id=two))
+    ChatMember.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_directory_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChatMember',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('chat', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='members', to='core.mentorshipchat')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chat_memberships', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('user', 'chat')},
+            },
+        ),
+        migrations.RunPython(merge_duplicate_chats, migrations.RunPython.noop),
+        migrations.RunPython(create_memberships, migrations.RunPython.noop),
+        migrations.RunPython(reconcile_unread, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='mentorshipchat',
+            constraint=models.UniqueConstraint(fields=('participant_one', 'participant_two'), name='core_chat_pair_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='mentorshipchat',
+            constraint=models.CheckConstraint(condition=models.Q(('participant_one__lt', models.F('participant_two'))), name='core_chat_pair_ordered'),
+        ),
+    ]
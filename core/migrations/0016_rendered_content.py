@@ -0,0 +1,33 @@
+# Generated by Django 5.1.2 on 2026-10-18 15:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_job_queue'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blog',
+            name='content_html',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='blog',
+            name='content_html_key',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='tutorial',
+            name='content_html',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='tutorial',
+            name='content_html_key',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+    ]
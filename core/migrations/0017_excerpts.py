@@ -0,0 +1,33 @@
+# Generated by Django 5.1.2 on 2026-10-18 15:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_rendered_content'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blog',
+            name='excerpt',
+            field=models.CharField(blank=True, editable=False, max_length=400),
+        ),
+        migrations.AddField(
+            model_name='blog',
+            name='reading_time',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='tutorial',
+            name='excerpt',
+            field=models.CharField(blank=True, editable=False, max_length=400),
+        ),
+        migrations.AddField(
+            model_name='tutorial',
+            name='reading_time',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+    ]
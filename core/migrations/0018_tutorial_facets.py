@@ -0,0 +1,44 @@
+# Generated by Django 5.1.2 on 2026-10-18 15:57
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_tutorial_counts(apps, schema_editor):
+    Category = apps.get_model('core', 'Category')
+    Tutorial = apps.get_model('core', 'Tutorial')
+    rows = (
+        Tutorial.objects.filter(category=OuterRef('pk'))
+        .order_by()
+        .values('category')
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    Category.objects.update(
+        tutorial_count=Coalesce(Subquery(rows, output_field=IntegerField()), Value(0))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_excerpts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='tutorial_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='tutorial',
+            index=models.Index(fields=['created_at', 'id'], name='core_tutorial_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tutorial',
+            index=models.Index(fields=['category', 'created_at', 'id'], name='core_tutorial_cat_recent_idx'),
+        ),
+        migrations.RunPython(backfill_tutorial_counts, migrations.RunPython.noop),
+    ]
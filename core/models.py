@@ -1,5 +1,5 @@
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
-from django.db import models
+from django.db import models, transaction
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from django.core.exceptions import ValidationError
@@ -39,6 +39,8 @@ class User(AbstractBaseUser, PermissionsMixin):
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
     date_joined = models.DateTimeField(default=timezone.now)
+    # Denormalized header badge count, maintained by core.unread
+    unread_message_count = models.PositiveIntegerField(default=0)
 
     objects = UserManager()
 
@@ -55,7 +57,7 @@ class Profile(models.Model):
     bio = models.TextField(blank=True)
     profile_picture = models.ImageField(upload_to='profile_pics/', blank=True, null=True)
     career_journey = models.TextField(blank=True, help_text="A brief overview of the career journey.")
-    location = models.CharField(max_length=255, blank=True, help_text="User's current location.")
+    location = models.CharField(max_length=255, blank=True, db_index=True, help_text="User's current location.")
     contact_number = models.CharField(max_length=15, blank=True, help_text="Contact phone number.")
 
     twitter = models.URLField(blank=True, help_text="URL to Twitter profile.")
@@ -81,6 +83,12 @@ class Skill(models.Model):
     profile = models.ForeignKey(Profile, on_delete=models.CASCADE, related_name='skills')
     name = models.CharField(max_length=100, help_text="Name of the skill.")
 
+    class Meta:
+        indexes = [
+            # Directory filter: profiles having a skill, and the skill facet list
+            models.Index(fields=['name', 'profile'], name='core_skill_name_idx'),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -109,6 +117,8 @@ class Category(models.Model):
     name = models.CharField(max_length=255)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Facet count for the tutorials filter bar, kept in sync by core.signals
+    tutorial_count = models.PositiveIntegerField(default=0)
 
     def __str__(self):
         return self.name
@@ -122,6 +132,35 @@ class Tutorial(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     video = models.FileField(upload_to='tutorial_videos/', null=True, blank=True)  # Field for video
     category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='tutorials', default=1)
+    # Markdown content rendered to sanitized HTML by core.rendering; the key
+    # is a hash of the content and renderer version the HTML was built from
+    content_html = models.TextField(blank=True, editable=False)
+    content_html_key = models.CharField(max_length=64, blank=True, editable=False)
+    # Plain-text summary and reading time derived from content_html, so
+    # listings can defer both content columns
+    excerpt = models.CharField(max_length=400, blank=True, editable=False)
+    reading_time = models.PositiveSmallIntegerField(default=0, editable=False)  # minutes
+
+    # Denormalized engagement counters, kept in sync by core.signals
+    like_count = models.PositiveIntegerField(default=0)
+    dislike_count = models.PositiveIntegerField(default=0)
+    comment_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            # Newest-first keyset listing, overall and per category
+            models.Index(fields=['created_at', 'id'], name='core_tutorial_recent_idx'),
+            models.Index(fields=['category', 'created_at', 'id'], name='core_tutorial_cat_recent_idx'),
+        ]
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Remember the stored category so a move can be detected on save
+        self._saved_category_id = self.__dict__.get('category_id')
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._saved_category_id = self.category_id
 
     def __str__(self):
         return self.title
@@ -139,6 +178,26 @@ class Blog(models.Model):
     image = models.ImageField(upload_to='blog_images/', blank=True, null=True)
     video = models.FileField(upload_to='blog_videos/', blank=True, null=True)
 
+    # Markdown content rendered to sanitized HTML by core.rendering; the key
+    # is a hash of the content and renderer version the HTML was built from
+    content_html = models.TextField(blank=True, editable=False)
+    content_html_key = models.CharField(max_length=64, blank=True, editable=False)
+    # Plain-text summary and reading time derived from content_html, so
+    # listings can defer both content columns
+    excerpt = models.CharField(max_length=400, blank=True, editable=False)
+    reading_time = models.PositiveSmallIntegerField(default=0, editable=False)  # minutes
+
+    # Denormalized engagement counters, kept in sync by core.signals
+    like_count = models.PositiveIntegerField(default=0)
+    dislike_count = models.PositiveIntegerField(default=0)
+    comment_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            # Newest-first keyset listing for visitors without a timeline
+            models.Index(fields=['created_at', 'id'], name='core_blog_recent_idx'),
+        ]
+
     def clean(self):
         # Ensure only one media file (image or video) is uploaded
         if self.image and self.video:
@@ -162,6 +221,18 @@ class Comment(models.Model):
     tutorial = models.ForeignKey(Tutorial, on_delete=models.CASCADE, null=True, blank=True, related_name="comments")
     blog = models.ForeignKey(Blog, on_delete=models.CASCADE, null=True, blank=True, related_name="comments")
 
+    class Meta:
+        indexes = [
+            # Keyset pagination of comment threads seeks on (created_at, id)
+            models.Index(fields=['blog', 'created_at', 'id'], name='core_comment_blog_seek_idx'),
+            models.Index(fields=['tutorial', 'created_at', 'id'], name='core_comment_tut_seek_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        # Keep the row and the parent's comment_count in one transaction
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
     def __str__(self):
         return f"Comment by {self.user.username} on {'Tutorial' if self.tutorial else 'Blog'}"
 
@@ -176,6 +247,16 @@ class LikeDislike(models.Model):
     class Meta:
         unique_together = (("user", "tutorial"), ("user", "blog"))
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Remember the stored vote so a like <-> dislike flip can be detected on save
+        self._saved_is_like = self.__dict__.get('is_like')
+
+    def save(self, *args, **kwargs):
+        # The parent's like/dislike counters are buffered by core.signals once this commits
+        super().save(*args, **kwargs)
+        self._saved_is_like = self.is_like
+
     def __str__(self):
         item = self.tutorial or self.blog
         item_type = 'Tutorial' if self.tutorial else 'Blog'
@@ -183,17 +264,64 @@ class LikeDislike(models.Model):
 
 
 class MentorshipChat(models.Model):
+    # Participants are stored as a canonical pair (participant_one has the
+    # lower id), so there is exactly one chat per pair of users.
     participant_one = models.ForeignKey(User, on_delete=models.CASCADE, related_name='sent_chats')
     participant_two = models.ForeignKey(User, on_delete=models.CASCADE, related_name='received_chats')
     created_at = models.DateTimeField(auto_now_add=True)
     last_message = models.TextField(blank=True, null=True)  # To store the last message
     last_message_date = models.DateTimeField(auto_now=True)  # To store the date of the last message
+    # Read cursors: id of the newest message each participant has seen
+    participant_one_last_read = models.BigIntegerField(default=0)
+    participant_two_last_read = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['participant_one', 'participant_two'], name='core_chat_pair_uniq'),
+            models.CheckConstraint(
+                condition=models.Q(participant_one__lt=models.F('participant_two')),
+                name='core_chat_pair_ordered',
+            ),
+        ]
 
     def __str__(self):
         return f'Chat between {self.participant_one} and {self.participant_two}'
-    def get_unread_messages(self): return self.messages.filter(is_read=False, sender__ne=self)
-    
 
+    @staticmethod
+    def pair(user_id, other_id):
+        # (participant_one_id, participant_two_id) for two users, in either order
+        return (user_id, other_id) if user_id < other_id else (other_id, user_id)
+
+    @classmethod
+    def between(cls, user_id, other_id):
+        # The chat of two users, created on first use; returns (chat, created)
+        one, two = cls.pair(user_id, other_id)
+        return cls.objects.get_or_create(participant_one_id=one, participant_two_id=two)
+
+    def read_cursor_field(self, user):
+        if user.id == self.participant_one_id:
+            return 'participant_one_last_read'
+        return 'participant_two_last_read'
+
+    def last_read_id(self, user):
+        return getattr(self, self.read_cursor_field(user))
+
+    def get_unread_messages(self, user):
+        # Messages from the other participant newer than the user's cursor
+        return self.messages.filter(id__gt=self.last_read_id(user)).exclude(sender=user)
+
+
+class ChatMember(models.Model):
+    # One row per participant of a chat; the (user, chat) unique index lets
+    # an inbox be read as "chats of this user" without an OR across columns.
+    chat = models.ForeignKey(MentorshipChat, on_delete=models.CASCADE, related_name='members')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='chat_memberships')
+
+    class Meta:
+        unique_together = (("user", "chat"),)
+
+    def __str__(self):
+        return f"{self.user} in chat {self.chat_id}"
 
 
 class MentorshipMessage(models.Model):
@@ -201,9 +329,158 @@ class MentorshipMessage(models.Model):
     sender = models.ForeignKey(User, on_delete=models.CASCADE, related_name="sent_messages")
     content = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
-    is_read = models.BooleanField(default=False)  # Track if the message has been read
+
+    class Meta:
+        indexes = [
+            # Unread counts are id ranges above a chat's read cursor
+            models.Index(fields=['chat', 'id'], name='core_msg_chat_id_idx'),
+        ]
+
+    @property
+    def is_read(self):
+        # Whether the recipient's read cursor has passed this message
+        chat = self.chat
+        if self.sender_id == chat.participant_one_id:
+            return self.id <= chat.participant_two_last_read
+        return self.id <= chat.participant_one_last_read
 
     def __str__(self):
         return f"Message from {self.sender.username} in chat {self.chat.id} at {self.created_at}"
 
 
+
+
+# Precomputed trending score for a blog post, read by the posts sidebar
+class TrendingScore(models.Model):
+    blog = models.OneToOneField(Blog, on_delete=models.CASCADE, primary_key=True, related_name='trending')
+    engagement = models.IntegerField(default=0, help_text="Likes, dislikes and comments counted so far.")
+    base = models.FloatField(default=0, help_text="Time-decay component derived from the publish date.")
+    score = models.FloatField(default=0, db_index=True)
+    recomputed_at = models.DateTimeField(default=timezone.now, help_text="When the score was last rebuilt from source.")
+
+    def __str__(self):
+        return f"Trending score {self.score:.3f} for {self.blog_id}"
+
+
+# Inverted search index over blogs, tutorials and profiles, maintained by core.search
+class SearchDocument(models.Model):
+    KIND_CHOICES = [
+        ('blog', 'Blog'),
+        ('tutorial', 'Tutorial'),
+        ('profile', 'Profile'),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    recency = models.FloatField(default=0, help_text="Ranking bonus derived from the publish date.")
+    indexed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = (("kind", "object_id"),)
+
+    def __str__(self):
+        return f"{self.get_kind_display()} #{self.object_id}"
+
+
+class SearchPosting(models.Model):
+    document = models.ForeignKey(SearchDocument, on_delete=models.CASCADE, related_name='postings')
+    term = models.CharField(max_length=64)
+    weight = models.FloatField()
+
+    class Meta:
+        indexes = [
+            # Exact and prefix lookups both seek on term
+            models.Index(fields=['term', 'document'], name='core_posting_term_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.term} -> {self.document}"
+
+
+# Denormalized copy of a Profile with its user and related rows, maintained by core.snapshots
+class ProfileSnapshot(models.Model):
+    profile = models.OneToOneField(Profile, on_delete=models.CASCADE, primary_key=True, related_name='snapshot')
+    data = models.JSONField()
+    version = models.PositiveSmallIntegerField(default=1, help_text="Layout version of data; older ones are rebuilt on read.")
+    built_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Snapshot of profile {self.profile_id}"
+
+
+class Follow(models.Model):
+    follower = models.ForeignKey(User, on_delete=models.CASCADE, related_name='following')
+    author = models.ForeignKey(User, on_delete=models.CASCADE, related_name='followers')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = (("follower", "author"),)
+
+    def __str__(self):
+        return f"{self.follower} follows {self.author}"
+
+
+# Precomputed feed row: a blog or tutorial placed in a user's timeline, maintained by core.feeds
+class TimelineEntry(models.Model):
+    REASON_CHOICES = [
+        ('own', 'Own post'),
+        ('following', 'Followed author'),
+        ('trending', 'Trending'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='timeline')
+    blog = models.ForeignKey(Blog, on_delete=models.CASCADE, null=True, blank=True, related_name='timeline_entries')
+    tutorial = models.ForeignKey(Tutorial, on_delete=models.CASCADE, null=True, blank=True, related_name='timeline_entries')
+    reason = models.CharField(max_length=20, choices=REASON_CHOICES)
+    created_at = models.DateTimeField(help_text="Publish date of the blog or tutorial.")
+
+    class Meta:
+        unique_together = (("user", "blog"), ("user", "tutorial"))
+        indexes = [
+            # A feed page is a seek on (user, created_at, id)
+            models.Index(fields=['user', 'created_at', 'id'], name='core_timeline_seek_idx'),
+        ]
+
+    @property
+    def kind(self):
+        return 'blog' if self.blog_id else 'tutorial'
+
+    @property
+    def item(self):
+        return self.blog if self.blog_id else self.tutorial
+
+    def __str__(self):
+        return f"{self.get_reason_display()} {self.kind} {self.item} for {self.user}"
+
+
+# Background job queue (core.jobs); rows are claimed by `manage.py run_jobs` workers
+class Job(models.Model):
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+    ]
+
+    task = models.CharField(max_length=200, help_text="Dotted path of the task function.")
+    args = models.JSONField(default=list, blank=True)
+    kwargs = models.JSONField(default=dict, blank=True)
+    idempotency_key = models.CharField(max_length=255, unique=True, null=True, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=100, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Workers claim the oldest due job with this index
+            models.Index(fields=['status', 'run_after', 'id'], name='core_job_ready_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.task} #{self.id} ({self.status})"
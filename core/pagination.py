@@ -0,0 +1,129 @@
+import base64
+import binascii
+import json
+from functools import reduce
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+class KeysetPage:
+    # Mirrors the parts of django.core.paginator.Page the templates use,
+    # with opaque cursors in place of page numbers.
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    @property
+    def next_cursor(self):
+        if not self._has_next or not self.object_list:
+            return None
+        return self.paginator.encode_cursor(self.object_list[-1], 'next')
+
+    @property
+    def previous_cursor(self):
+        if not self._has_previous or not self.object_list:
+            return None
+        return self.paginator.encode_cursor(self.object_list[0], 'previous')
+
+
+class KeysetPaginator:
+    """
+    Paginate an ordered queryset by seeking past the last row seen instead
+    of counting and OFFSETting. `ordering` must end in a unique field (the
+    default is ('created_at', 'id')) and be backed by a matching index;
+    prefix every field with '-' for a newest-first list.
+    """
+
+    def __init__(self, queryset, per_page, ordering=('created_at', 'id')):
+        descending = {field.startswith('-') for field in ordering}
+        if len(descending) != 1:
+            raise ValueError("Keyset ordering fields must all share one direction.")
+        self.queryset = queryset
+        self.per_page = per_page
+        self.ordering = tuple(ordering)
+        self.descending = descending.pop()
+        self.fields = tuple(field.lstrip('-') for field in ordering)
+
+    def encode_cursor(self, obj, direction):
+        values = [self._model_field(name).value_to_string(obj) for name in self.fields]
+        payload = json.dumps([direction[0], values], separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        # Returns (direction, values) or None for a missing or malformed cursor
+        if not cursor:
+            return None
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            direction, raw_values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            if direction not in ('n', 'p') or len(raw_values) != len(self.fields):
+                return None
+            values = [
+                self._model_field(name).to_python(value)
+                for name, value in zip(self.fields, raw_values)
+            ]
+        except (binascii.Error, ValueError, TypeError, ValidationError):
+            return None
+        return ('next' if direction == 'n' else 'previous'), values
+
+    def get_page(self, cursor=None):
+        decoded = self.decode_cursor(cursor)
+        if decoded is None:
+            rows = list(self.queryset.order_by(*self.ordering)[:self.per_page + 1])
+            return KeysetPage(rows[:self.per_page], self, len(rows) > self.per_page, False)
+
+        direction, values = decoded
+        if direction == 'next':
+            rows = list(
+                self.queryset.filter(self._seek(values, forward=True))
+                .order_by(*self.ordering)[:self.per_page + 1]
+            )
+            return KeysetPage(rows[:self.per_page], self, len(rows) > self.per_page, True)
+
+        reversed_ordering = [self._flip(field) for field in self.ordering]
+        rows = list(
+            self.queryset.filter(self._seek(values, forward=False))
+            .order_by(*reversed_ordering)[:self.per_page + 1]
+        )
+        has_previous = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        rows.reverse()
+        return KeysetPage(rows, self, True, has_previous)
+
+    def _seek(self, values, forward):
+        # (f1, f2, ...) > (v1, v2, ...) expanded into an OR of prefixes
+        greater = forward != self.descending
+        lookup = 'gt' if greater else 'lt'
+        clauses = []
+        for position, name in enumerate(self.fields):
+            equal_prefix = {field: value for field, value in zip(self.fields[:position], values)}
+            clauses.append(Q(**equal_prefix, **{f'{name}__{lookup}': values[position]}))
+        return reduce(lambda left, right: left | right, clauses)
+
+    def _model_field(self, name):
+        return self.queryset.model._meta.get_field(name)
+
+    @staticmethod
+    def _flip(field):
+        return field[1:] if field.startswith('-') else f'-{field}'
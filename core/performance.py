@@ -0,0 +1,242 @@
+import logging
+import random
+import re
+import threading
+import time
+from collections import deque
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.template.backends.django import Template as DjangoTemplate
+
+logger = logging.getLogger(__name__)
+
+# Profile of the request being handled on this thread/task, if it is sampled
+_current = ContextVar('core_performance_profile', default=None)
+WHITESPACE_RE = re.compile(r"\s+")
+
+
+class RequestProfile:
+    def __init__(self):
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self.statements = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        # connection.execute_wrapper hook
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.sql_count += 1
+            self.sql_time += elapsed
+            entry = self.statements.setdefault(sql, [0, 0.0])
+            entry[0] += 1
+            entry[1] += elapsed
+
+    def top_statements(self, limit):
+        # Identical statements are grouped, which also surfaces N+1 loops
+        ranked = sorted(self.statements.items(), key=lambda item: item[1][1], reverse=True)
+        return [
+            {'sql': WHITESPACE_RE.sub(' ', sql)[:1000], 'count': count, 'ms': round(elapsed * 1000, 2)}
+            for sql, (count, elapsed) in ranked[:limit]
+        ]
+
+
+class RequestStats:
+    """
+    Rolling per-view samples of recent requests, kept in this process.
+
+    Each view keeps its last `window` samples, so percentiles describe
+    recent traffic and memory stays bounded.
+    """
+
+    def __init__(self, window=1000):
+        self.window = window
+        self._lock = threading.Lock()
+        self._samples = {}
+
+    def record(self, view_name, total_ms, sql_ms, sql_count, template_ms):
+        with self._lock:
+            samples = self._samples.get(view_name)
+            if samples is None:
+                samples = self._samples[view_name] = deque(maxlen=self.window)
+            samples.append((total_ms, sql_ms, sql_count, template_ms))
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+
+    def summary(self):
+        with self._lock:
+            snapshot = {name: list(samples) for name, samples in self._samples.items()}
+        views = {}
+        for name, samples in sorted(snapshot.items()):
+            totals = sorted(sample[0] for sample in samples)
+            views[name] = {
+                'samples': len(samples),
+                'p50_ms': percentile(totals, 50),
+                'p90_ms': percentile(totals, 90),
+                'p95_ms': percentile(totals, 95),
+                'p99_ms': percentile(totals, 99),
+                'max_ms': round(totals[-1], 2),
+                'avg_sql_ms': round(sum(sample[1] for sample in samples) / len(samples), 2),
+                'avg_queries': round(sum(sample[2] for sample in samples) / len(samples), 2),
+                'avg_template_ms': round(sum(sample[3] for sample in samples) / len(samples), 2),
+            }
+        return views
+
+
+def percentile(ordered, pct):
+    # Nearest-rank percentile of an already sorted list
+    if not ordered:
+        return None
+    rank = max(int(round(pct / 100 * len(ordered) + 0.5)) - 1, 0)
+    return round(ordered[min(rank, len(ordered) - 1)], 2)
+
+
+stats = RequestStats()
+
+
+_original_render = DjangoTemplate.render
+_render_lock = threading.Lock()
+_timed_requests = 0
+
+
+def _timed_render(self, context=None, request=None):
+    profile = _current.get()
+    if profile is None:
+        return _original_render(self, context, request)
+    started = time.perf_counter()
+    try:
+        return _original_render(self, context, request)
+    finally:
+        profile.template_time += time.perf_counter() - started
+
+
+@contextmanager
+def timing_templates():
+    # Top-level template renders (render(), TemplateResponse, render_to_string)
+    # all go through the backend Template; includes are counted in their
+    # parent. The timed render is only installed while at least one sampled
+    # request is in flight; concurrent unsampled requests pass straight through.
+    global _timed_requests
+    with _render_lock:
+        if not _timed_requests:
+            DjangoTemplate.render = _timed_render
+        _timed_requests += 1
+    try:
+        yield
+    finally:
+        with _render_lock:
+            _timed_requests -= 1
+            if not _timed_requests:
+                DjangoTemplate.render = _original_render
+
+
+def instrument(stack, profile):
+    # Connections are per thread, so this must run in the thread that will
+    # execute the view's queries
+    stack.enter_context(timing_templates())
+    for connection in connections.all():
+        stack.enter_context(connection.execute_wrapper(profile))
+
+
+class PerformanceMiddleware:
+    """
+    Samples requests and measures SQL count/time, template render time and
+    total time. Sampled responses carry a Server-Timing header, feed the
+    per-view percentiles shown at core:performance_stats, and requests slower
+    than PERFORMANCE_SLOW_REQUEST_MS are logged with their costliest SQL.
+    Unsampled requests only pay for one random() call.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, 'PERFORMANCE_SAMPLE_RATE', 0.0)
+        self.slow_ms = getattr(settings, 'PERFORMANCE_SLOW_REQUEST_MS', 500)
+        self.top_sql = getattr(settings, 'PERFORMANCE_SLOW_SQL_LIMIT', 5)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.sample_rate or random.random() >= self.sample_rate:
+            return self.get_response(request)
+
+        profile = RequestProfile()
+        token = _current.set(profile)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                instrument(stack, profile)
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        total_ms = (time.perf_counter() - started) * 1000
+        self.finish(request, response, profile, total_ms)
+        return response
+
+    async def __acall__(self, request):
+        # Under ASGI, sync views run in the request's thread-sensitive worker
+        # thread, so the recorder is installed and removed there. Streaming
+        # responses (the event stream) are timed until the response is
+        # returned; queries issued while streaming are not counted.
+        if not self.sample_rate or random.random() >= self.sample_rate:
+            return await self.get_response(request)
+
+        profile = RequestProfile()
+        token = _current.set(profile)
+        stack = ExitStack()
+        started = time.perf_counter()
+        try:
+            await sync_to_async(instrument)(stack, profile)
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+            _current.reset(token)
+        total_ms = (time.perf_counter() - started) * 1000
+        await sync_to_async(self.finish)(request, response, profile, total_ms)
+        return response
+
+    def finish(self, request, response, profile, total_ms):
+        sql_ms = profile.sql_time * 1000
+        template_ms = profile.template_time * 1000
+        view_ms = max(total_ms - sql_ms - template_ms, 0)
+        response['Server-Timing'] = ", ".join([
+            f'db;dur={sql_ms:.2f};desc="{profile.sql_count} queries"',
+            f'tpl;dur={template_ms:.2f};desc="Templates"',
+            f'app;dur={view_ms:.2f};desc="View code"',
+            f'total;dur={total_ms:.2f}',
+        ])
+
+        match = request.resolver_match
+        view_name = match.view_name if match else 'unresolved'
+        stats.record(view_name, total_ms, sql_ms, profile.sql_count, template_ms)
+
+        if total_ms >= self.slow_ms:
+            record = {
+                'view': view_name,
+                'method': request.method,
+                'path': request.path,
+                'status': response.status_code,
+                'total_ms': round(total_ms, 2),
+                'sql_ms': round(sql_ms, 2),
+                'sql_count': profile.sql_count,
+                'template_ms': round(template_ms, 2),
+                'top_sql': profile.top_statements(self.top_sql),
+            }
+            logger.warning(
+                "Slow request %s %s took %.0fms (%d queries, %.0fms SQL)",
+                request.method, request.path, total_ms, profile.sql_count, sql_ms,
+                extra={'performance': record},
+            )
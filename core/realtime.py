@@ -0,0 +1,71 @@
+import asyncio
+import json
+import threading
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+
+class InProcessBroker:
+    """
+    Fan-out of events to the event streams connected to this process.
+
+    Any replacement (Redis pub/sub, etc.) only needs the same three methods;
+    point settings.REALTIME_BROKER at it. publish() may be called from any
+    thread, subscribe()/unsubscribe() from the event loop serving the stream.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = {}
+
+    def subscribe(self, user_id):
+        queue = asyncio.Queue(maxsize=100)
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self._subscribers.setdefault(user_id, set()).add((loop, queue))
+        return queue
+
+    def unsubscribe(self, user_id, queue):
+        with self._lock:
+            subscribers = self._subscribers.get(user_id, set())
+            subscribers.difference_update({entry for entry in subscribers if entry[1] is queue})
+            if not subscribers:
+                self._subscribers.pop(user_id, None)
+
+    def publish(self, user_id, event):
+        with self._lock:
+            subscribers = list(self._subscribers.get(user_id, ()))
+        for loop, queue in subscribers:
+            loop.call_soon_threadsafe(_offer, queue, event)
+
+
+def _offer(queue, event):
+    # Slow consumers lose events rather than growing memory without bound
+    if not queue.full():
+        queue.put_nowait(event)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                path = getattr(settings, 'REALTIME_BROKER', 'core.realtime.InProcessBroker')
+                _broker = import_string(path)()
+    return _broker
+
+
+def publish_on_commit(user_id, event_type, data):
+    # Deliver only once the write that produced the event is visible
+    event = {'type': event_type, 'data': data}
+    transaction.on_commit(lambda: get_broker().publish(user_id, event))
+
+
+def format_sse(event):
+    return f"event: {event['type']}\ndata: {json.dumps(event['data'])}\n\n"
@@ -0,0 +1,109 @@
+import hashlib
+import html
+import re
+
+from django.db import transaction
+from django.utils.html import strip_tags
+from django.utils.safestring import mark_safe
+from django.utils.text import Truncator
+from markdown_it import MarkdownIt
+
+from .models import Blog, Tutorial
+
+# Blog and tutorial content is Markdown. It is rendered once, when the row
+# is saved, and the HTML is stored next to it with a key hashing the content
+# and RENDERER_VERSION; rows whose key no longer matches (bulk inserts,
+# queryset updates, a new renderer version) are re-rendered on first read
+# or in bulk with `manage.py rerender_markdown`. The plain-text excerpt and
+# reading time shown in listings are derived at the same time, so listing
+# queries can defer both content columns (LISTING_DEFERRED).
+
+# Bump whenever the parser configuration, render rules or the excerpt and
+# reading-time rules below change
+RENDERER_VERSION = 2
+
+EXCERPT_LENGTH = 300  # characters; the excerpt columns hold up to 400
+READING_WORDS_PER_MINUTE = 200
+
+MODELS = (Blog, Tutorial)
+RENDERED_FIELDS = ['content_html', 'content_html_key', 'excerpt', 'reading_time']
+# Columns listings never render; pass to .defer() on Blog/Tutorial querysets
+LISTING_DEFERRED = ('content', 'content_html')
+
+# Raw HTML in the source is escaped, not passed through, and markdown-it
+# refuses javascript:/vbscript:/data: links, so the output needs no
+# separate sanitizer.
+_parser = MarkdownIt('commonmark', {'html': False, 'breaks': True}).enable(['table', 'strikethrough'])
+
+
+def _link_open(self, tokens, idx, options, env):
+    # Links are user-submitted: don't pass on ranking or the opener
+    tokens[idx].attrSet('rel', 'nofollow ugc noopener')
+    return self.renderToken(tokens, idx, options, env)
+
+
+_parser.add_render_rule('link_open', _link_open)
+
+
+def content_key(content):
+    return hashlib.sha256(f"{RENDERER_VERSION}\n{content or ''}".encode()).hexdigest()
+
+
+def render(content):
+    return _parser.render(content or '')
+
+
+def plain_text(rendered):
+    # Visible text of rendered HTML, whitespace collapsed
+    return re.sub(r'\s+', ' ', html.unescape(strip_tags(rendered))).strip()
+
+
+def reading_time(text):
+    words = len(text.split())
+    return max(1, round(words / READING_WORDS_PER_MINUTE)) if words else 0
+
+
+def refresh(obj):
+    # Bring obj's rendered fields up to date in memory; True if they changed
+    key = content_key(obj.content)
+    if obj.content_html_key == key:
+        return False
+    obj.content_html = render(obj.content)
+    obj.content_html_key = key
+    text = plain_text(obj.content_html)
+    obj.excerpt = Truncator(text).chars(EXCERPT_LENGTH)
+    obj.reading_time = reading_time(text)
+    return True
+
+
+def html_for(obj):
+    # Safe HTML of a Blog or Tutorial, rendering and storing it if stale
+    if refresh(obj):
+        type(obj).objects.filter(pk=obj.pk).update(
+            **{field: getattr(obj, field) for field in RENDERED_FIELDS}
+        )
+    return mark_safe(obj.content_html)
+
+
+def rerender_all(force=False, batch_size=500):
+    # Re-render every stale row (all rows with force); returns how many changed
+    total = 0
+    for model in MODELS:
+        last_pk = 0
+        while True:
+            batch = list(
+                model.objects.filter(pk__gt=last_pk).order_by('pk')
+                .only('pk', 'content', 'content_html_key')[:batch_size]
+            )
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+            if force:
+                for obj in batch:
+                    obj.content_html_key = ''
+            stale = [obj for obj in batch if refresh(obj)]
+            if stale:
+                with transaction.atomic():
+                    model.objects.bulk_update(stale, RENDERED_FIELDS)
+                total += len(stale)
+    return total
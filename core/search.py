@@ -0,0 +1,148 @@
+import math
+import re
+from collections import Counter
+from datetime import datetime, timezone as dt_timezone
+from functools import reduce
+from operator import add
+
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Max, Q, Sum, When
+
+from . import rendering
+from .models import Blog, Profile, SearchDocument, SearchPosting, Tutorial
+
+TITLE_BOOST = 3.0
+# One point of ranking bonus per year since the epoch, so newer documents
+# win ties without drowning out relevance.
+RECENCY_EPOCH = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+RECENCY_SECONDS = 365 * 24 * 3600
+MAX_TERM_LENGTH = 64
+
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the "
+    "this to was were will with".split()
+)
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text):
+    return [
+        token[:MAX_TERM_LENGTH]
+        for token in TOKEN_RE.findall((text or "").lower())
+        if len(token) > 1 and token not in STOPWORDS
+    ]
+
+
+def _fields_for(kind, obj):
+    # (title text, body text, publish date) for each indexed model
+    if kind == 'blog' or kind == 'tutorial':
+        return obj.title, obj.content, obj.created_at
+    return obj.user.username, f"{obj.bio} {obj.career_journey} {obj.location}", obj.user.date_joined
+
+
+def kind_of(obj):
+    if isinstance(obj, Blog):
+        return 'blog'
+    if isinstance(obj, Tutorial):
+        return 'tutorial'
+    if isinstance(obj, Profile):
+        return 'profile'
+    raise TypeError(f"{type(obj).__name__} is not searchable.")
+
+
+def _postings(title, body):
+    title_counts = Counter(tokenize(title))
+    body_counts = Counter(tokenize(body))
+    weights = {}
+    for term in set(title_counts) | set(body_counts):
+        weight = TITLE_BOOST * title_counts[term]
+        if body_counts[term]:
+            # Dampen repeated body terms so long posts don't dominate
+            weight += 1 + math.log(body_counts[term])
+        weights[term] = weight
+    return weights
+
+
+def index_object(obj):
+    kind = kind_of(obj)
+    title, body, published_at = _fields_for(kind, obj)
+    recency = (published_at - RECENCY_EPOCH).total_seconds() / RECENCY_SECONDS
+    with transaction.atomic():
+        document, _ = SearchDocument.objects.update_or_create(
+            kind=kind, object_id=obj.pk, defaults={'recency': recency}
+        )
+        document.postings.all().delete()
+        SearchPosting.objects.bulk_create([
+            SearchPosting(document=document, term=term, weight=weight)
+            for term, weight in _postings(title, body).items()
+        ])
+    return document
+
+
+def remove_object(obj):
+    SearchDocument.objects.filter(kind=kind_of(obj), object_id=obj.pk).delete()
+
+
+def search_documents(query, kinds=None):
+    # Documents matching every query term by prefix, best first
+    terms = list(dict.fromkeys(tokenize(query)))
+    if not terms:
+        return SearchDocument.objects.none()
+
+    documents = SearchDocument.objects.filter(
+        reduce(lambda left, right: left | right, [Q(postings__term__startswith=term) for term in terms])
+    )
+    if kinds:
+        documents = documents.filter(kind__in=kinds)
+    matched_terms = reduce(add, [
+        Max(Case(When(postings__term__startswith=term, then=1), default=0, output_field=IntegerField()))
+        for term in terms
+    ])
+    return (
+        documents.annotate(text_score=Sum('postings__weight'), matched_terms=matched_terms)
+        .filter(matched_terms=len(terms))
+        .annotate(rank=F('text_score') + F('recency'))
+        .order_by('-rank', '-id')
+    )
+
+
+def matching_ids(query, kind):
+    return search_documents(query, kinds=[kind]).values_list('object_id', flat=True)
+
+
+def load_objects(documents):
+    # Resolve a page of SearchDocuments to model instances, one query per kind
+    querysets = {
+        'blog': Blog.objects.select_related('author').defer(*rendering.LISTING_DEFERRED),
+        'tutorial': Tutorial.objects.select_related('author', 'category').defer(*rendering.LISTING_DEFERRED),
+        'profile': Profile.objects.select_related('user'),
+    }
+    wanted = {}
+    for document in documents:
+        wanted.setdefault(document.kind, []).append(document.object_id)
+    loaded = {
+        kind: querysets[kind].in_bulk(ids)
+        for kind, ids in wanted.items()
+    }
+    results = []
+    for document in documents:
+        obj = loaded[document.kind].get(document.object_id)
+        if obj is not None:
+            results.append({'kind': document.kind, 'object': obj, 'rank': document.rank})
+    return results
+
+
+def rebuild(batch_size=500):
+    # Re-index every searchable object; documents for deleted rows are dropped
+    total = 0
+    with transaction.atomic():
+        SearchDocument.objects.all().delete()
+        for queryset in (
+            Blog.objects.order_by('pk'),
+            Tutorial.objects.order_by('pk'),
+            Profile.objects.select_related('user').order_by('pk'),
+        ):
+            for obj in queryset.iterator(chunk_size=batch_size):
+                index_object(obj)
+                total += 1
+    return total
@@ -0,0 +1,212 @@
+from django.db.models.signals import post_save, post_delete, pre_save
+from django.dispatch import receiver
+
+from . import caching, feeds, images, jobs, rendering, search, snapshots, trending
+from .counters import buffer as counter_buffer, shifted
+from .models import (
+    Achievement, Blog, Category, Certificate, ChatMember, Comment, Follow, LikeDislike, MentorshipChat, Profile,
+    Skill, Tutorial, User, WorkExperience,
+)
+
+# Which page/fragment cache generation a model's rows belong to
+CACHE_GENERATIONS = {
+    Blog: 'blogs',
+    Tutorial: 'tutorials',
+    Comment: 'comments',
+    LikeDislike: 'votes',
+    Category: 'categories',
+    Follow: 'follows',
+    User: 'profiles',
+    Profile: 'profiles',
+    Certificate: 'profiles',
+    Skill: 'profiles',
+    Achievement: 'profiles',
+    WorkExperience: 'profiles',
+}
+
+
+@receiver(pre_save, sender=Blog)
+@receiver(pre_save, sender=Tutorial)
+def render_content(sender, instance, raw=False, update_fields=None, **kwargs):
+    # Store the rendered Markdown, excerpt and reading time with the row;
+    # only re-renders edited content. Partial saves that leave content out
+    # are skipped, so saving a listing instance never loads deferred content.
+    if raw or (update_fields is not None and 'content' not in update_fields):
+        return
+    rendering.refresh(instance)
+
+
+@receiver(post_save, sender=Blog)
+def blog_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        trending.track_blog(instance)
+
+
+@receiver(post_save, sender=Blog)
+@receiver(post_save, sender=Tutorial)
+def published(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        feeds.enqueue_fan_out('blog' if sender is Blog else 'tutorial', instance.id)
+
+
+@receiver(post_save, sender=Follow)
+def follow_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        jobs.enqueue(feeds.sync_follow, instance.follower_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    jobs.enqueue(feeds.sync_follow, instance.follower_id, instance.author_id)
+
+
+@receiver(post_save, sender=Blog)
+@receiver(post_save, sender=Tutorial)
+@receiver(post_save, sender=Profile)
+def searchable_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        search.index_object(instance)
+
+
+@receiver(post_delete, sender=Blog)
+@receiver(post_delete, sender=Tutorial)
+@receiver(post_delete, sender=Profile)
+def searchable_deleted(sender, instance, **kwargs):
+    search.remove_object(instance)
+
+
+@receiver(post_save, sender=Blog)
+@receiver(post_save, sender=Profile)
+def image_saved(sender, instance, raw=False, **kwargs):
+    # Resized variants of a new upload are generated by a background job
+    if raw:
+        return
+    field_file = instance.image if sender is Blog else instance.profile_picture
+    if field_file:
+        jobs.enqueue(
+            images.generate_variants_for, sender._meta.label_lower, instance.pk,
+            key=f"images.variants:{field_file.name}",
+        )
+
+
+# comment_count is written in the comment's own transaction (Comment.save
+# and delete() are atomic), so it is exact the moment the comment commits.
+# Only trending engagement goes through the counter buffer.
+def _count_comment(instance, delta):
+    for model, pk in ((Blog, instance.blog_id), (Tutorial, instance.tutorial_id)):
+        if pk:
+            model.objects.filter(pk=pk).update(comment_count=shifted('comment_count', delta))
+    if instance.blog_id:
+        counter_buffer.add_on_commit(instance, engagement=delta)
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        _count_comment(instance, 1)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    _count_comment(instance, -1)
+
+
+# Vote counters go through the counter buffer (see core.counters): the
+# handlers only write the row itself, and hot posts don't serialize every
+# voter on their counter row
+@receiver(post_save, sender=LikeDislike)
+def like_dislike_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        if instance.is_like:
+            counter_buffer.add_on_commit(instance, engagement=1, like_count=1)
+        else:
+            counter_buffer.add_on_commit(instance, engagement=1, dislike_count=1)
+    elif instance._saved_is_like is not None and instance._saved_is_like != instance.is_like:
+        # The vote was flipped
+        delta = 1 if instance.is_like else -1
+        counter_buffer.add_on_commit(instance, like_count=delta, dislike_count=-delta)
+
+
+@receiver(post_delete, sender=LikeDislike)
+def like_dislike_deleted(sender, instance, **kwargs):
+    if instance.is_like:
+        counter_buffer.add_on_commit(instance, engagement=-1, like_count=-1)
+    else:
+        counter_buffer.add_on_commit(instance, engagement=-1, dislike_count=-1)
+
+
+# Category facet counts change only when tutorials are added, moved or
+# removed, rarely enough to write them directly
+def _count_tutorials(category_id, delta):
+    Category.objects.filter(pk=category_id).update(tutorial_count=shifted('tutorial_count', delta))
+
+
+@receiver(post_save, sender=Tutorial)
+def tutorial_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        _count_tutorials(instance.category_id, 1)
+    elif instance._saved_category_id is not None and instance._saved_category_id != instance.category_id:
+        _count_tutorials(instance._saved_category_id, -1)
+        _count_tutorials(instance.category_id, 1)
+
+
+@receiver(post_delete, sender=Tutorial)
+def tutorial_deleted(sender, instance, **kwargs):
+    _count_tutorials(instance.category_id, -1)
+
+
+@receiver(post_save, sender=MentorshipChat)
+def chat_saved(sender, instance, created, raw=False, **kwargs):
+    # Membership rows back the inbox query (see ChatMember)
+    if created and not raw:
+        ChatMember.objects.bulk_create([
+            ChatMember(chat=instance, user_id=instance.participant_one_id),
+            ChatMember(chat=instance, user_id=instance.participant_two_id),
+        ], ignore_conflicts=True)
+
+
+@receiver(post_save, sender=Profile)
+def profile_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        snapshots.rebuild_on_commit(instance.id)
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or (update_fields is not None and set(update_fields) == {'last_login'}):
+        return
+    for profile_id in Profile.objects.filter(user=instance).values_list('id', flat=True):
+        snapshots.rebuild_on_commit(profile_id)
+
+
+@receiver(post_save, sender=Certificate)
+@receiver(post_save, sender=Skill)
+@receiver(post_save, sender=Achievement)
+@receiver(post_save, sender=WorkExperience)
+@receiver(post_delete, sender=Certificate)
+@receiver(post_delete, sender=Skill)
+@receiver(post_delete, sender=Achievement)
+@receiver(post_delete, sender=WorkExperience)
+def profile_detail_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        snapshots.rebuild_on_commit(instance.profile_id)
+
+
+# Connected after the snapshot handlers so that, on commit, a snapshot is
+# rewritten before the cache generation that serves it is bumped.
+def cached_model_changed(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    if sender is User and update_fields is not None and set(update_fields) == {'last_login'}:
+        # Logging in doesn't change anything that is rendered
+        return
+    caching.bump_on_commit(CACHE_GENERATIONS[sender])
+
+
+for model in CACHE_GENERATIONS:
+    post_save.connect(cached_model_changed, sender=model, dispatch_uid=f'cache-{model.__name__}-save')
+    post_delete.connect(cached_model_changed, sender=model, dispatch_uid=f'cache-{model.__name__}-delete')
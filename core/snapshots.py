@@ -0,0 +1,181 @@
+import logging
+from datetime import date
+
+from django.db import DatabaseError, transaction
+from django.db.models import Prefetch
+
+from .bulk import upsert
+from .models import Achievement, Certificate, Profile, ProfileSnapshot, Skill, WorkExperience
+
+logger = logging.getLogger(__name__)
+
+# Bump when the layout of ProfileSnapshot.data changes; snapshots written
+# with an older layout are rebuilt the next time they are read.
+SNAPSHOT_VERSION = 1
+
+SOCIAL_FIELDS = ('twitter', 'linkedin', 'facebook', 'instagram')
+# Keys of related rows that hold dates, stored as ISO strings
+DATE_FIELDS = {
+    'certificates': ('date_issued',),
+    'work_experience': ('start_date', 'end_date'),
+    'achievements': ('date_achieved',),
+}
+
+
+def _certificate(certificate):
+    return {
+        'title': certificate.title,
+        'institution': certificate.institution,
+        'date_issued': certificate.date_issued.isoformat(),
+        'description': certificate.description,
+    }
+
+
+def _experience(experience):
+    return {
+        'job_title': experience.job_title,
+        'company_name': experience.company_name,
+        'start_date': experience.start_date.isoformat(),
+        'end_date': experience.end_date.isoformat() if experience.end_date else None,
+        'responsibilities': experience.responsibilities,
+    }
+
+
+def _achievement(achievement):
+    return {
+        'title': achievement.title,
+        'date_achieved': achievement.date_achieved.isoformat(),
+        'description': achievement.description,
+    }
+
+
+# A profile's related rows: model, display order and how each row is stored
+RELATED = {
+    'certificates': (Certificate, ('-date_issued', 'id'), _certificate),
+    'skills': (Skill, ('name', 'id'), lambda skill: skill.name),
+    'work_experience': (WorkExperience, ('-start_date', 'id'), _experience),
+    'achievements': (Achievement, ('-date_achieved', 'id'), _achievement),
+}
+
+
+def prefetch(name):
+    model, ordering, _ = RELATED[name]
+    return Prefetch(name, queryset=model.objects.order_by(*ordering))
+
+
+def serialize_related(profile, name):
+    # Rows of a profile loaded with prefetch(name), in their stored form
+    return [RELATED[name][2](row) for row in getattr(profile, name).all()]
+
+
+def _profiles():
+    # Everything a snapshot needs, in display order, in five queries per batch
+    return Profile.objects.select_related('user').prefetch_related(*(prefetch(name) for name in RELATED))
+
+
+def serialize(profile):
+    user = profile.user
+    return {
+        'id': profile.id,
+        'user': {
+            'id': user.id,
+            'username': user.username,
+            'first_name': user.first_name,
+            'last_name': user.last_name,
+        },
+        'bio': profile.bio,
+        'career_journey': profile.career_journey,
+        'location': profile.location,
+        'contact_number': profile.contact_number,
+        'profile_picture': profile.profile_picture.name or None,
+        **{field: getattr(profile, field) for field in SOCIAL_FIELDS},
+        **{name: serialize_related(profile, name) for name in RELATED},
+    }
+
+
+def for_display(data):
+    # Turn stored JSON back into template-friendly values: dates as date
+    # objects and the picture as a file, so {% responsive_image %} works.
+    data = dict(data)
+    for key, fields in DATE_FIELDS.items():
+        rows = []
+        for row in data[key]:
+            row = dict(row)
+            for field in fields:
+                if row[field]:
+                    row[field] = date.fromisoformat(row[field])
+            rows.append(row)
+        data[key] = rows
+    if data['profile_picture']:
+        field = Profile._meta.get_field('profile_picture')
+        data['profile_picture'] = field.attr_class(None, field, data['profile_picture'])
+    return data
+
+
+def rebuild(profile_id):
+    # (Re)write one profile's snapshot; returns its data, None if the profile is gone
+    profile = _profiles().filter(pk=profile_id).first()
+    if profile is None:
+        ProfileSnapshot.objects.filter(profile_id=profile_id).delete()
+        return None
+    data = serialize(profile)
+    ProfileSnapshot.objects.update_or_create(
+        profile_id=profile_id, defaults={'data': data, 'version': SNAPSHOT_VERSION}
+    )
+    return data
+
+
+def rebuild_on_commit(profile_id):
+    transaction.on_commit(lambda: rebuild(profile_id))
+
+
+def get(profile_id):
+    # Display-ready snapshot of one profile with a single primary-key read
+    row = ProfileSnapshot.objects.filter(pk=profile_id).values_list('data', 'version').first()
+    if row is not None and row[1] == SNAPSHOT_VERSION:
+        data = row[0]
+    else:
+        data = rebuild(profile_id)
+    return for_display(data) if data is not None else None
+
+
+def for_profiles(profiles):
+    # Display-ready snapshots for Profiles loaded with select_related('snapshot'),
+    # in the same order; missing or outdated snapshots are rebuilt on the way
+    stored = {}
+    for profile in profiles:
+        try:
+            snapshot = profile.snapshot
+        except ProfileSnapshot.DoesNotExist:
+            continue
+        if snapshot.version == SNAPSHOT_VERSION:
+            stored[profile.id] = snapshot.data
+    stale = [profile.id for profile in profiles if profile.id not in stored]
+    if stale:
+        live = list(_profiles().filter(pk__in=stale))
+        try:
+            with transaction.atomic():
+                stored.update(_write(live))
+        except DatabaseError:
+            # Snapshots are a cache: if they can't be written, serve the
+            # page from the live rows and leave the rebuild for later
+            logger.exception("Could not write snapshots for profiles %s", stale)
+            stored.update({profile.id: serialize(profile) for profile in live})
+    return [for_display(stored[profile.id]) for profile in profiles if profile.id in stored]
+
+
+def _write(profiles):
+    rows = [ProfileSnapshot(profile_id=profile.id, data=serialize(profile), version=SNAPSHOT_VERSION)
+            for profile in profiles]
+    upsert(ProfileSnapshot, rows, 'profile', ['data', 'version', 'built_at'])
+    return {row.profile_id: row.data for row in rows}
+
+
+def rebuild_all(batch_size=500):
+    total = 0
+    ids = list(Profile.objects.order_by('pk').values_list('pk', flat=True))
+    for start in range(0, len(ids), batch_size):
+        total += len(_write(_profiles().filter(pk__in=ids[start:start + batch_size])))
+    # Drop snapshots whose profile no longer exists; cascades normally do this
+    ProfileSnapshot.objects.exclude(profile__in=Profile.objects.all()).delete()
+    return total
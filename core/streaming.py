@@ -0,0 +1,135 @@
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils.http import content_disposition_header, http_date, parse_http_date_safe, quote_etag
+
+CHUNK_SIZE = 64 * 1024
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def file_etag(size, mtime):
+    return quote_etag(f"{size:x}-{int(mtime):x}")
+
+
+def parse_range(header, size):
+    """
+    Return (start, end) inclusive for a single-range Range header, None when
+    the whole file should be sent, or False when the range is unsatisfiable.
+    Multi-range requests and invalid ranges (last byte before the first) are
+    answered with the whole file, as if there were no Range header.
+    """
+    match = RANGE_RE.match(header.strip()) if header else None
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the final N bytes
+        length = int(last)
+        if length == 0:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(first)
+    if last and int(last) < start:
+        return None
+    if start >= size:
+        return False
+    end = int(last) if last else size - 1
+    return start, min(end, size - 1)
+
+
+def _read_range(handle, start, length):
+    try:
+        handle.seek(start)
+        remaining = length
+        while remaining > 0:
+            chunk = handle.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+    finally:
+        handle.close()
+
+
+def _if_range_matches(request, etag, last_modified):
+    if_range = request.headers.get('If-Range')
+    if not if_range:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == int(last_modified)
+
+
+def _offload(field_file, content_type, etag, mtime):
+    # Let the front proxy send the bytes (and handle Range) itself
+    mode = getattr(settings, 'MEDIA_SENDFILE', None)
+    if not mode:
+        return None
+    response = HttpResponse(content_type=content_type)
+    if mode == 'x-accel-redirect':
+        prefix = getattr(settings, 'MEDIA_ACCEL_PREFIX', '/protected-media/')
+        response['X-Accel-Redirect'] = prefix.rstrip('/') + '/' + field_file.name
+    elif mode == 'x-sendfile':
+        response['X-Sendfile'] = field_file.path
+    else:
+        raise ValueError(f"Unknown MEDIA_SENDFILE mode: {mode}")
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(mtime)
+    return response
+
+
+def serve_file(request, field_file):
+    # Serve a stored file with Range/206, ETag/If-Range and conditional GET
+    storage = field_file.storage
+    size = storage.size(field_file.name)
+    mtime = storage.get_modified_time(field_file.name).timestamp()
+    etag = file_etag(size, mtime)
+    content_type = mimetypes.guess_type(field_file.name)[0] or 'application/octet-stream'
+
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(',')]:
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
+        return response
+
+    offloaded = _offload(field_file, content_type, etag, mtime)
+    if offloaded is not None:
+        return offloaded
+
+    byte_range = None
+    if _if_range_matches(request, etag, mtime):
+        byte_range = parse_range(request.headers.get('Range'), size)
+
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f"bytes */{size}"
+    elif byte_range is None:
+        if request.method == 'HEAD':
+            response = HttpResponse(content_type=content_type)
+        else:
+            # FileResponse lets the server use wsgi.file_wrapper / sendfile
+            response = FileResponse(storage.open(field_file.name, 'rb'), content_type=content_type)
+        response['Content-Length'] = str(size)
+    else:
+        start, end = byte_range
+        length = end - start + 1
+        if request.method == 'HEAD':
+            response = HttpResponse(content_type=content_type, status=206)
+        else:
+            handle = storage.open(field_file.name, 'rb')
+            response = StreamingHttpResponse(
+                _read_range(handle, start, length), content_type=content_type, status=206
+            )
+        response['Content-Range'] = f"bytes {start}-{end}/{size}"
+        response['Content-Length'] = str(length)
+
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(mtime)
+    response['Content-Disposition'] = content_disposition_header(False, os.path.basename(field_file.name))
+    return response
@@ -0,0 +1,395 @@
+import random
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from itertools import accumulate, product
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.db.models import Max, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from . import caching, counters, feeds, rendering, search, snapshots, trending, unread
+from .models import (
+    Achievement, Blog, Category, Certificate, ChatMember, Comment, Follow, LikeDislike, MentorshipChat,
+    MentorshipMessage, Profile, Skill, Tutorial, User, WorkExperience,
+)
+
+WORDS = (
+    "report story source editor deadline interview election budget health climate "
+    "community council court data verify fact photo video radio audience investigation "
+    "district market school farmer water energy policy minister rural urban youth "
+    "women justice press freedom coverage field notes evidence document archive "
+    "headline draft publish broadcast podcast newsletter local national region"
+).split()
+LOCATIONS = ["Lilongwe", "Blantyre", "Mzuzu", "Zomba", "Kasungu", "Mangochi", "Karonga", "Salima"]
+SKILLS = ["Editing", "Research", "Video", "Radio", "Data", "Photography", "Fact-checking", "Interviewing"]
+INSTITUTIONS = ["Press Institute", "Media Council", "School of Journalism", "Newsroom Academy"]
+COMPANIES = ["Daily News", "Nation Online", "Community Radio", "Times Group", "Freelance"]
+CATEGORIES = ["Writing", "Photography", "Data", "Broadcast", "Investigations", "Ethics"]
+
+# Generated timestamps fall in the `days` before this moment. It is fixed so
+# that a seed reproduces the same rows on every run; pass a recent `end` for
+# data that trending and feed retention treat as current.
+DEFAULT_END = datetime(2026, 10, 1, tzinfo=timezone.utc)
+# Random draws of new chat pairs before the rest are filled in order
+CHAT_DRAW_ROUNDS = 10
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    # bulk_create runs pre_save, which would stamp every auto_now/auto_now_add
+    # column with the current time; switch them off so generated dates stick.
+    fields = [
+        field for model in models for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class SyntheticDataset:
+    """
+    Deterministic bulk data for load testing.
+
+    Rows are streamed into batched bulk_create calls, one transaction per
+    batch, so memory stays flat no matter how many rows are requested; only
+    primary keys of parent rows are held. Authors, comment/vote targets and
+    chat lengths follow a Zipf distribution (`skew`), which produces power
+    users, hot posts and long chats. The same seed always yields the same
+    rows. Assumes no other writer inserts into these tables meanwhile, since
+    new primary keys are read back by range (MySQL's bulk_create can't
+    return them).
+    """
+
+    def __init__(self, *, users, mentors, blogs, tutorials, comments, votes, chats, messages,
+                 follows=0, seed=0, skew=1.1, days=365, end=None, batch_size=5000, prefix='synthetic',
+                 password='synthetic', log=None):
+        self.counts = {
+            'users': users, 'mentors': min(mentors, users), 'blogs': blogs, 'tutorials': tutorials,
+            'comments': comments, 'votes': votes, 'chats': chats, 'messages': messages,
+            'follows': follows,
+        }
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.skew = skew
+        self.batch_size = batch_size
+        self.prefix = prefix
+        self.password = password
+        self.log = log or (lambda message: None)
+        self.end = (end or DEFAULT_END).replace(microsecond=0)
+        self.start = self.end - timedelta(days=days)
+
+    # Helpers
+
+    def _moment(self):
+        return self.start + timedelta(seconds=self.rng.random() * (self.end - self.start).total_seconds())
+
+    def _text(self, words):
+        return " ".join(self.rng.choices(WORDS, k=max(words, 1))).capitalize() + "."
+
+    def _paragraphs(self, mean_words):
+        count = max(1, int(self.rng.lognormvariate(0, 0.5) * 3))
+        return "\n\n".join(
+            self._text(int(self.rng.gauss(mean_words, mean_words / 3))) for _ in range(count)
+        )
+
+    def _zipf(self, ids):
+        # Cumulative weights for rng.choices; ranks are shuffled so "hot"
+        # rows are spread over the id range instead of being the oldest ones
+        ranked = list(ids)
+        self.rng.shuffle(ranked)
+        weights = accumulate(1 / (rank ** self.skew) for rank in range(1, len(ranked) + 1))
+        return ranked, list(weights)
+
+    def _pick(self, population, k):
+        ranked, weights = population
+        return self.rng.choices(ranked, cum_weights=weights, k=k)
+
+    def _insert(self, model, rows, label=None):
+        # bulk_create an iterable of unsaved instances in batches; returns how many
+        total = 0
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                total += self._flush(model, batch)
+                batch = []
+        if batch:
+            total += self._flush(model, batch)
+        self.log(f"{label or model._meta.verbose_name_plural}: {total}")
+        return total
+
+    def _flush(self, model, batch):
+        with transaction.atomic(), explicit_timestamps(model):
+            model.objects.bulk_create(batch)
+        return len(batch)
+
+    def _new_ids(self, model, after):
+        return list(model.objects.filter(pk__gt=after).order_by('pk').values_list('pk', flat=True))
+
+    def _high_water(self, model):
+        return model.objects.aggregate(top=Max('pk'))['top'] or 0
+
+    # Stages
+
+    def generate(self):
+        if User.objects.filter(username__startswith=f"{self.prefix}_").exists():
+            raise ValueError(f"Rows with the prefix '{self.prefix}' already exist; pick another --prefix.")
+        users, mentors = self.create_users()
+        self.create_profiles(users)
+        categories = self.create_categories()
+        blogs = self.create_posts(Blog, self.counts['blogs'], users)
+        tutorials = self.create_posts(Tutorial, self.counts['tutorials'], users, categories=categories)
+        mentor_ids = set(mentors)
+        members = [user_id for user_id in users if user_id not in mentor_ids]
+        self.create_engagement(users, blogs, tutorials)
+        self.create_follows(users)
+        self.create_chats(members, mentors)
+
+    def create_users(self):
+        after = self._high_water(User)
+        # Hashing is deliberately slow; every synthetic account shares one hash
+        password = make_password(self.password, salt=f"{self.prefix}{self.seed}")
+        mentor_count = self.counts['mentors']
+        self._insert(User, (
+            User(
+                email=f"{self.prefix}_{n}@example.com",
+                username=f"{self.prefix}_{n}",
+                first_name=self.rng.choice(WORDS).capitalize(),
+                last_name=self.rng.choice(WORDS).capitalize(),
+                password=password,
+                is_staff=n < mentor_count,
+                date_joined=self._moment(),
+            )
+            for n in range(self.counts['users'])
+        ))
+        ids = self._new_ids(User, after)
+        return ids, ids[:mentor_count]
+
+    def create_profiles(self, users):
+        after = self._high_water(Profile)
+        self._insert(Profile, (
+            Profile(
+                user_id=user_id,
+                bio=self._text(40),
+                career_journey=self._text(80),
+                location=self.rng.choice(LOCATIONS),
+                contact_number=f"0999{user_id % 1000000:06d}",
+            )
+            for user_id in users
+        ))
+        profiles = self._new_ids(Profile, after)
+        self._insert(Certificate, (
+            Certificate(
+                profile_id=profile_id,
+                title=f"{self.rng.choice(WORDS).capitalize()} Journalism",
+                institution=self.rng.choice(INSTITUTIONS),
+                date_issued=self._moment().date(),
+            )
+            for profile_id in profiles for _ in range(self.rng.randint(0, 3))
+        ))
+        self._insert(Skill, (
+            Skill(profile_id=profile_id, name=name)
+            for profile_id in profiles for name in self.rng.sample(SKILLS, self.rng.randint(1, 5))
+        ))
+        self._insert(Achievement, (
+            Achievement(profile_id=profile_id, title=self._text(4), date_achieved=self._moment().date())
+            for profile_id in profiles for _ in range(self.rng.randint(0, 2))
+        ))
+        self._insert(WorkExperience, (
+            WorkExperience(
+                profile_id=profile_id,
+                job_title=self.rng.choice(["Reporter", "Editor", "Producer", "Correspondent"]),
+                company_name=self.rng.choice(COMPANIES),
+                start_date=self._moment().date(),
+                responsibilities=self._text(25),
+            )
+            for profile_id in profiles for _ in range(self.rng.randint(1, 3))
+        ))
+
+    def create_categories(self):
+        existing = dict(Category.objects.values_list('name', 'id'))
+        missing = [
+            Category(name=name, created_at=self.start, updated_at=self.start)
+            for name in CATEGORIES if name not in existing
+        ]
+        if missing:
+            self._insert(Category, missing, label="categories")
+        return list(Category.objects.order_by('pk').values_list('pk', flat=True))
+
+    def create_posts(self, model, count, users, categories=None):
+        after = self._high_water(model)
+        authors = self._zipf(users)
+
+        def rows():
+            for author_id in self._pick(authors, count):
+                created_at = self._moment()
+                fields = {
+                    'title': self._text(self.rng.randint(3, 10)).rstrip('.'),
+                    'content': self._paragraphs(120),
+                    'author_id': author_id,
+                    'created_at': created_at,
+                    'updated_at': created_at,
+                }
+                if categories:
+                    fields['category_id'] = self.rng.choice(categories)
+                yield model(**fields)
+
+        self._insert(model, rows())
+        return self._new_ids(model, after)
+
+    def _targets(self, blogs, tutorials, total):
+        # Split a row budget between blogs and tutorials, then over hot targets
+        blog_share = len(blogs) / max(len(blogs) + len(tutorials), 1)
+        for field, ids, share in (('blog', blogs, blog_share), ('tutorial', tutorials, 1 - blog_share)):
+            if ids:
+                yield field, self._zipf(ids), int(total * share)
+
+    def create_engagement(self, users, blogs, tutorials):
+        def comments():
+            for field, targets, count in self._targets(blogs, tutorials, self.counts['comments']):
+                remaining = count
+                while remaining:
+                    chunk = min(remaining, self.batch_size)
+                    remaining -= chunk
+                    for target_id in self._pick(targets, chunk):
+                        created_at = self._moment()
+                        yield Comment(
+                            user_id=self.rng.choice(users),
+                            content=self._text(self.rng.randint(5, 40)),
+                            created_at=created_at,
+                            updated_at=created_at,
+                            **{f'{field}_id': target_id},
+                        )
+
+        self._insert(Comment, comments())
+
+        def votes():
+            # (user, target) is unique: draw per-target totals first, then
+            # sample that many distinct voters for each target (capped at the
+            # number of users, so very hot targets can absorb fewer votes)
+            for field, targets, count in self._targets(blogs, tutorials, self.counts['votes']):
+                per_target = {}
+                for target_id in self._pick(targets, count):
+                    per_target[target_id] = per_target.get(target_id, 0) + 1
+                for target_id in sorted(per_target):
+                    for user_id in self.rng.sample(users, min(per_target[target_id], len(users))):
+                        yield LikeDislike(
+                            user_id=user_id, is_like=self.rng.random() < 0.85, **{f'{field}_id': target_id}
+                        )
+
+        self._insert(LikeDislike, votes(), label="votes")
+
+    def create_follows(self, users):
+        # Followers per author follow the skew, so a few authors have huge
+        # audiences (the expensive case for timeline fan-out)
+        per_author = {}
+        for author_id in self._pick(self._zipf(users), self.counts['follows']):
+            per_author[author_id] = per_author.get(author_id, 0) + 1
+
+        def follows():
+            for author_id in sorted(per_author):
+                candidates = self.rng.sample(users, min(per_author[author_id] + 1, len(users)))
+                followers = [user_id for user_id in candidates if user_id != author_id]
+                for follower_id in followers[:per_author[author_id]]:
+                    yield Follow(follower_id=follower_id, author_id=author_id, created_at=self._moment())
+
+        self._insert(Follow, follows())
+
+    def create_chats(self, members, mentors):
+        if not members or not mentors:
+            return
+        # One chat per (member, mentor) pair
+        pairs = set()
+        limit = min(self.counts['chats'], len(members) * len(mentors))
+        active = self._zipf(members)
+        for _ in range(CHAT_DRAW_ROUNDS):
+            if len(pairs) >= limit:
+                break
+            for member_id in self._pick(active, limit - len(pairs)):
+                pairs.add((member_id, self.rng.choice(mentors)))
+        # Close to members x mentors, draws mostly hit existing pairs; take
+        # the missing ones from the most active members down instead
+        ranked, _ = active
+        for pair in product(ranked, mentors):
+            if len(pairs) >= limit:
+                break
+            pairs.add(pair)
+        pairs = sorted(pairs)
+
+        # Chat lengths follow the same skew, so a few threads are very long
+        lengths = {}
+        for index in self._pick(self._zipf(range(len(pairs))), self.counts['messages']):
+            lengths[index] = lengths.get(index, 0) + 1
+
+        # Lay out each thread's timeline up front so the chat row can carry
+        # its last message; messages are then generated from the same plan
+        plans = []
+        for index, (member_id, mentor_id) in enumerate(pairs):
+            started = self._moment()
+            step = (self.end - started).total_seconds() / (lengths.get(index, 0) + 1)
+            plans.append((member_id, mentor_id, started, step, lengths.get(index, 0)))
+
+        after = self._high_water(MentorshipChat)
+
+        def chats():
+            for member_id, mentor_id, started, step, length in plans:
+                last = started + timedelta(seconds=step * length)
+                one, two = MentorshipChat.pair(member_id, mentor_id)
+                yield MentorshipChat(
+                    participant_one_id=one,
+                    participant_two_id=two,
+                    created_at=started,
+                    last_message=self._text(8) if length else None,
+                    last_message_date=last,
+                )
+
+        self._insert(MentorshipChat, chats())
+        chat_ids = self._new_ids(MentorshipChat, after)
+
+        def messages():
+            for chat_id, (member_id, mentor_id, started, step, length) in zip(chat_ids, plans):
+                for n in range(length):
+                    yield MentorshipMessage(
+                        chat_id=chat_id,
+                        sender_id=member_id if self.rng.random() < 0.55 else mentor_id,
+                        content=self._text(self.rng.randint(3, 30)),
+                        created_at=started + timedelta(seconds=step * (n + 1)),
+                    )
+
+        self._insert(MentorshipMessage, messages())
+        self._insert(ChatMember, (
+            ChatMember(chat_id=chat_id, user_id=user_id)
+            for chat_id, (member_id, mentor_id, *_) in zip(chat_ids, plans)
+            for user_id in (member_id, mentor_id)
+        ), label="chat memberships")
+
+        # Three chats in four have been read up to date by both sides
+        newest = Coalesce(Subquery(
+            MentorshipMessage.objects.filter(chat=OuterRef('pk')).order_by('-id').values('id')[:1]
+        ), Value(0))
+        read = [chat_id for n, chat_id in enumerate(chat_ids) if n % 4]
+        for start in range(0, len(read), self.batch_size):
+            with transaction.atomic():
+                MentorshipChat.objects.filter(pk__in=read[start:start + self.batch_size]).update(
+                    participant_one_last_read=newest, participant_two_last_read=newest,
+                )
+
+    def rebuild_derived(self, include_search=True, include_feeds=True):
+        # bulk_create bypasses signals; derive counters and indexes in bulk
+        caching.bump_all()
+        counters.recount_engagement()
+        self.log(f"rendered markdown: {rendering.rerender_all(batch_size=self.batch_size)}")
+        self.log(f"trending scores: {trending.rebuild(batch_size=self.batch_size)}")
+        self.log(f"unread counters: {unread.reconcile()}")
+        self.log(f"profile snapshots: {snapshots.rebuild_all(batch_size=self.batch_size)}")
+        if include_feeds:
+            self.log(f"timeline entries: {feeds.rebuild_all()}")
+        if include_search:
+            self.log(f"search documents: {search.rebuild(batch_size=self.batch_size)}")
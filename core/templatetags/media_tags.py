@@ -0,0 +1,32 @@
+from django import template
+from django.forms.utils import flatatt
+from django.utils.html import format_html
+
+from core import images
+
+register = template.Library()
+
+
+@register.simple_tag
+def responsive_image(field_file, variant='card', sizes=None, **attrs):
+    """
+    Render an uploaded image as a <picture> with WebP and JPEG srcsets of
+    the generated derivatives, `variant` being the default size. Falls back
+    to the original upload until its derivatives have been generated.
+    """
+    if not field_file:
+        return ''
+    attrs.setdefault('loading', 'lazy')
+    if not images.has_variants(field_file):
+        return format_html('<img src="{}"{}>', field_file.url, flatatt(attrs))
+
+    width = min(images.VARIANTS[variant], images.original_width(field_file))
+    sizes = sizes or f"(max-width: {width}px) 100vw, {width}px"
+    webp_srcset = ', '.join(f"{url} {w}w" for url, w in images.variant_urls(field_file, 'webp'))
+    jpeg_srcset = ', '.join(f"{url} {w}w" for url, w in images.variant_urls(field_file, 'jpg'))
+    src = field_file.storage.url(images.variant_name(field_file.name, variant, 'jpg'))
+    return format_html(
+        '<picture><source type="image/webp" srcset="{}" sizes="{}">'
+        '<img src="{}" srcset="{}" sizes="{}"{}></picture>',
+        webp_srcset, sizes, src, jpeg_srcset, sizes, flatatt(attrs),
+    )
@@ -1,3 +1,438 @@
-from django.test import TestCase
+import json
+import tempfile
+from io import BytesIO
+from unittest import mock
+from urllib.parse import parse_qs, urlsplit
 
-# Create your tests here.
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import DatabaseError, connection
+from django.db.migrations.executor import MigrationExecutor
+from django.db.models import QuerySet
+from django.template.backends.django import Template as DjangoTemplate
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from . import caching, counters, feeds, images, performance, rendering, signals, snapshots, streaming, trending, unread, votes
+from .benchmarks import SKIPPED_ROUTES, core_route_names, measure, route_table, seed_dataset
+from .models import Blog, ChatMember, Comment, MentorshipChat, MentorshipMessage, Profile, ProfileSnapshot, TrendingScore, User
+from .templatetags import media_tags
+
+
+class RouteQueryBudgetTests(TestCase):
+    # Regression guard for N+1 queries: every core route is requested
+    # against a seeded dataset and must stay within its query budget.
+    # `manage.py benchmark_routes` runs the same table and writes a report.
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = seed_dataset()
+
+    def test_every_route_has_a_budget(self):
+        measured = {entry[0] for entry in route_table(self.data)}
+        missing = core_route_names() - measured - set(SKIPPED_ROUTES)
+        self.assertFalse(missing, f"Routes without a query budget: {sorted(missing)}")
+
+    def test_routes_stay_within_query_budget(self):
+        for result in measure(self.data, repeat=1):
+            with self.subTest(route=result['route'], path=result['path'], signed_in=result['signed_in']):
+                self.assertLess(result['status'], 500)
+                if result['expected_status'] is not None:
+                    self.assertEqual(result['status'], result['expected_status'])
+                if result['revalidated']:
+                    self.assertEqual(result['bytes'], 0)
+                self.assertLessEqual(
+                    result['queries'], result['budget'],
+                    "Queries issued:\n" + "\n".join(result['sql']),
+                )
+
+
+class UpsertBackendTests(TestCase):
+    # Production runs on MySQL, whose upsert cannot name a conflict target;
+    # the other paths are forced here by switching the feature flags off.
+
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create(username='upsert', email='upsert@example.com')
+        cls.blogs = Blog.objects.bulk_create([
+            Blog(title=f"Upsert {n}", content="Body", author=author, like_count=n) for n in range(3)
+        ])
+
+    def rebuild_with(self, **flags):
+        features = connection.features
+        with mock.patch.multiple(features, **flags):
+            return trending.rebuild()
+
+    def test_update_conflicts_without_target(self):
+        with mock.patch.object(QuerySet, 'bulk_create', autospec=True) as bulk_create:
+            self.rebuild_with(supports_update_conflicts_with_target=False)
+        queryset, rows = bulk_create.call_args.args
+        kwargs = bulk_create.call_args.kwargs
+        self.assertIs(queryset.model, TrendingScore)
+        self.assertTrue(kwargs['update_conflicts'])
+        self.assertNotIn('unique_fields', kwargs)
+
+    def test_update_then_insert(self):
+        flags = {'supports_update_conflicts_with_target': False, 'supports_update_conflicts': False}
+        TrendingScore.objects.filter(blog__in=self.blogs[1:]).delete()
+        Blog.objects.filter(pk=self.blogs[0].pk).update(like_count=7)
+        self.assertEqual(self.rebuild_with(**flags), Blog.objects.count())
+        self.assertEqual(self.rebuild_with(**flags), Blog.objects.count())
+        self.assertEqual(TrendingScore.objects.filter(blog__in=self.blogs).count(), 3)
+        self.assertEqual(TrendingScore.objects.get(blog=self.blogs[0]).engagement, 7)
+
+    def test_snapshot_update_then_insert(self):
+        flags = {'supports_update_conflicts_with_target': False, 'supports_update_conflicts': False}
+        profile = Profile.objects.create(user=self.blogs[0].author, bio="Before")
+        with mock.patch.multiple(connection.features, **flags):
+            snapshots.rebuild_all()
+            Profile.objects.filter(pk=profile.pk).update(bio="After")
+            snapshots.rebuild_all()
+        self.assertEqual(ProfileSnapshot.objects.get(pk=profile.pk).data['bio'], "After")
+
+
+class CounterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create(username='counted', email='counted@example.com')
+        cls.blog = Blog.objects.create(title="Counted", content="Body", author=cls.reader)
+
+    def test_comment_count_is_written_with_the_comment(self):
+        comment = Comment.objects.create(user=self.reader, blog=self.blog, content="First")
+        self.assertEqual(Blog.objects.get(pk=self.blog.pk).comment_count, 1)
+        comment.delete()
+        self.assertEqual(Blog.objects.get(pk=self.blog.pk).comment_count, 0)
+
+    def cast_votes(self, buffer):
+        voter = User.objects.create(username='voter', email='voter@example.com')
+        with mock.patch.object(signals, 'counter_buffer', buffer), self.captureOnCommitCallbacks(execute=True):
+            votes.cast(self.reader, 'blog', self.blog.pk, 'like')
+            votes.cast(self.reader, 'blog', self.blog.pk, 'dislike')
+            votes.cast(voter, 'blog', self.blog.pk, 'like')
+            votes.cast(voter, 'blog', self.blog.pk, 'unlike')
+
+    def stored_votes(self):
+        return Blog.objects.values_list('like_count', 'dislike_count').get(pk=self.blog.pk)
+
+    def test_buffered_votes_are_written_on_flush(self):
+        buffer = counters.CounterBuffer(max_pending=100, flush_seconds=60)
+        self.cast_votes(buffer)
+        self.assertEqual(self.stored_votes(), (0, 0))
+        self.assertEqual(buffer.pending(Blog, self.blog.pk), {'like_count': 0, 'dislike_count': 1})
+        self.assertEqual(buffer.flush(), 1)
+        self.assertEqual(self.stored_votes(), (0, 1))
+        self.assertIsNone(buffer._timer)
+
+    def test_write_through_buffer(self):
+        self.cast_votes(counters.CounterBuffer(flush_seconds=0))
+        self.assertEqual(self.stored_votes(), (0, 1))
+
+    def test_failed_flush_keeps_deltas_and_retries(self):
+        buffer = counters.CounterBuffer(max_pending=100, flush_seconds=60)
+        buffer.add(Blog, self.blog.pk, like_count=2)
+        with mock.patch.object(buffer, '_write', side_effect=DatabaseError("down")):
+            self.assertEqual(buffer.flush(), 0)
+        self.addCleanup(buffer._timer.cancel)
+        self.assertIsNotNone(buffer._timer)
+        self.assertEqual(buffer.pending(Blog, self.blog.pk), {'like_count': 2})
+        buffer.flush()
+        self.assertEqual(self.stored_votes(), (2, 0))
+
+
+class SnapshotFallbackTests(TestCase):
+    def setUp(self):
+        # Generations are bumped on commit, which never happens in a TestCase
+        caching.get_cache().clear()
+
+    def test_directory_survives_failed_snapshot_write(self):
+        user = User.objects.create(username='fresh', email='fresh@example.com')
+        Profile.objects.create(user=user, bio="Just signed up")
+        ProfileSnapshot.objects.all().delete()
+        with mock.patch.object(snapshots, '_write', side_effect=DatabaseError("no upsert")):
+            response = self.client.get(reverse('core:profiles'))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Just signed up")
+
+
+class ResponsiveImageTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media_root.name))
+
+    def upload(self, name, width):
+        buffer = BytesIO()
+        Image.new('RGB', (width, 300)).save(buffer, 'JPEG')
+        field = Blog._meta.get_field('image')
+        return field.attr_class(None, field, default_storage.save(name, buffer))
+
+    def test_srcset_stops_at_original_width(self):
+        image = self.upload('blog_images/narrow.jpg', 500)
+        images.generate_variants(image)
+        html = media_tags.responsive_image(image, 'full')
+        self.assertIn('narrow.jpg/thumb.webp 160w', html)
+        self.assertIn('narrow.jpg/card.webp 500w', html)
+        self.assertIn('(max-width: 500px) 100vw, 500px', html)
+        self.assertNotIn('640w', html)
+        self.assertNotIn('narrow.jpg/full.webp', html)
+
+    def test_upload_named_like_a_variant_gets_variants(self):
+        image = self.upload('blog_images/me.thumb.jpg', 200)
+        self.assertFalse(images.is_variant(image.name))
+        self.assertEqual(len(images.generate_variants(image)), len(images.VARIANTS) * len(images.FORMATS))
+        self.assertTrue(images.has_variants(image))
+
+
+class FileStreamingTests(SimpleTestCase):
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media_root.name))
+        field = Blog._meta.get_field('video')
+        name = default_storage.save('blog_videos/clip.mp4', ContentFile(b'0123456789'))
+        self.video = field.attr_class(None, field, name)
+
+    def get(self, **headers):
+        response = streaming.serve_file(RequestFactory().get('/', **headers), self.video)
+        body = b''.join(response.streaming_content) if response.streaming else response.content
+        return response, body
+
+    def test_byte_range(self):
+        response, body = self.get(HTTP_RANGE='bytes=2-5')
+        self.assertEqual((response.status_code, body), (206, b'2345'))
+        self.assertEqual(response['Content-Range'], 'bytes 2-5/10')
+
+    def test_suffix_range(self):
+        response, body = self.get(HTTP_RANGE='bytes=-3')
+        self.assertEqual((response.status_code, body), (206, b'789'))
+
+    def test_unsatisfiable_range(self):
+        response, _ = self.get(HTTP_RANGE='bytes=10-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */10')
+
+    def test_invalid_range_is_ignored(self):
+        response, body = self.get(HTTP_RANGE='bytes=9-3')
+        self.assertEqual((response.status_code, body), (200, b'0123456789'))
+
+    def test_if_range_with_stale_etag_sends_whole_file(self):
+        response, body = self.get(HTTP_RANGE='bytes=2-5', HTTP_IF_RANGE='"stale"')
+        self.assertEqual((response.status_code, body), (200, b'0123456789'))
+        etag = response['ETag']
+        response, body = self.get(HTTP_RANGE='bytes=2-5', HTTP_IF_RANGE=etag)
+        self.assertEqual((response.status_code, body), (206, b'2345'))
+
+    def test_if_none_match(self):
+        etag = self.get()[0]['ETag']
+        response, body = self.get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual((response.status_code, body), (304, b''))
+
+
+class MarkdownRenderingTests(TestCase):
+    def test_raw_html_and_script_links_are_not_rendered(self):
+        author = User.objects.create(username='scripted', email='scripted@example.com')
+        blog = Blog.objects.create(author=author, title="Unsafe", content=(
+            "<script>alert(1)</script>\n\n"
+            "<img src=x onerror=alert(2)>\n\n"
+            "[x](javascript:alert(3)) [y](JaVaScRiPt:alert(4)) [z](data:text/html,hi) [ok](https://example.com)"
+        ))
+        html = str(rendering.html_for(Blog.objects.get(pk=blog.pk)))
+        self.assertNotIn('<script', html)
+        self.assertNotIn('<img', html)
+        self.assertIn('&lt;script&gt;alert(1)&lt;/script&gt;', html)
+        self.assertNotRegex(html.lower(), r'href="\s*(javascript|data):')
+        self.assertIn('<a href="https://example.com" rel="nofollow ugc noopener">ok</a>', html)
+
+
+class APITests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create(username='api', email='api@example.com')
+        cls.blogs = [
+            Blog.objects.create(author=author, title=f"API {n}", content="Body") for n in range(5)
+        ]
+
+    def get(self, path, **params):
+        response = self.client.get(path, params)
+        body = b''.join(response.streaming_content) if response.streaming else response.content
+        return response.status_code, json.loads(body)
+
+    def test_sparse_fieldset(self):
+        status, data = self.get(reverse('core:api_list', args=['blogs']), fields='id,title')
+        self.assertEqual(status, 200)
+        self.assertEqual({tuple(row) for row in data['results']}, {('id', 'title')})
+        status, data = self.get(reverse('core:api_detail', args=['blogs', self.blogs[0].pk]), fields='title')
+        self.assertEqual((status, data), (200, {'title': "API 0"}))
+
+    def test_bad_requests(self):
+        blogs = reverse('core:api_list', args=['blogs'])
+        status, data = self.get(blogs, fields='id,password')
+        self.assertEqual(status, 400)
+        self.assertIn('password', data['error'])
+        self.assertEqual(self.get(blogs, cursor='not-a-cursor')[0], 400)
+        self.assertEqual(self.get(blogs, limit='0')[0], 400)
+        self.assertEqual(self.get(reverse('core:api_list', args=['users']))[0], 404)
+
+    def test_cursor_round_trip(self):
+        blogs = reverse('core:api_list', args=['blogs'])
+        _, first = self.get(blogs, fields='id', limit=2)
+        _, second = self.get(blogs, fields='id', limit=2, cursor=parse_qs(urlsplit(first['next']).query)['cursor'][0])
+        _, back = self.get(blogs, fields='id', limit=2, cursor=parse_qs(urlsplit(second['previous']).query)['cursor'][0])
+        newest_first = [blog.pk for blog in reversed(self.blogs)]
+        self.assertEqual([row['id'] for row in first['results']], newest_first[:2])
+        self.assertEqual([row['id'] for row in second['results']], newest_first[2:4])
+        self.assertEqual(back['results'], first['results'])
+        self.assertIsNone(back['previous'])
+
+
+class ConditionalPageTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create(username='tagged', email='tagged@example.com')
+        cls.other = User.objects.create(username='other', email='other@example.com')
+        cls.blog = Blog.objects.create(author=cls.reader, title="Tagged", content="Body")
+
+    def setUp(self):
+        caching.get_cache().clear()
+        self.path = reverse('core:post_detail', args=[self.blog.pk])
+
+    def etag(self, client):
+        # The first visit may only set the CSRF cookie; the next one is tagged
+        for _ in range(2):
+            response = client.get(self.path)
+            if response.has_header('ETag'):
+                return response
+        self.fail("The page was never tagged.")
+
+    def test_tag_is_per_viewer(self):
+        anonymous = self.etag(self.client)
+        self.assertNotIn('private', anonymous['Cache-Control'])
+        self.assertEqual(self.client.get(self.path, HTTP_IF_NONE_MATCH=anonymous['ETag']).status_code, 304)
+
+        self.client.force_login(self.reader)
+        self.assertEqual(self.client.get(self.path, HTTP_IF_NONE_MATCH=anonymous['ETag']).status_code, 200)
+        signed_in = self.etag(self.client)
+        self.assertIn('private', signed_in['Cache-Control'])
+        self.assertNotEqual(signed_in['ETag'], anonymous['ETag'])
+
+        self.client.force_login(self.other)
+        self.assertEqual(self.client.get(self.path, HTTP_IF_NONE_MATCH=signed_in['ETag']).status_code, 200)
+
+    def test_pending_messages_are_never_revalidated(self):
+        etag = self.etag(self.client)['ETag']
+        self.client.cookies[CookieStorage.cookie_name] = 'pending'
+        response = self.client.get(self.path, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('ETag'))
+
+    def test_generation_bump_changes_the_tag(self):
+        etag = self.etag(self.client)['ETag']
+        caching.bump('blogs')
+        response = self.client.get(self.path, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+
+class ChatReadTests(TestCase):
+    def test_only_an_explicit_post_marks_messages_read(self):
+        reader = User.objects.create(username='reader', email='reader@example.com')
+        writer = User.objects.create(username='writer', email='writer@example.com')
+        chat, _ = MentorshipChat.between(reader.id, writer.id)
+        sent = [MentorshipMessage.objects.create(chat=chat, sender=writer, content=str(n)) for n in range(3)]
+        unread.add_unread(reader.id, len(sent))
+        self.client.force_login(reader)
+
+        response = self.client.get(reverse('core:chat_messages', args=[chat.id]), {'since': 0})
+        self.assertEqual(len(response.json()['messages']), 3)
+        reader.refresh_from_db()
+        self.assertEqual(reader.unread_message_count, 3)
+
+        response = self.client.post(reverse('core:chat_mark_read', args=[chat.id]), {'through': sent[1].id})
+        self.assertEqual(response.json(), {'marked_read': 2, 'total_unread_messages': 1})
+        reader.refresh_from_db()
+        self.assertEqual(reader.unread_message_count, 1)
+        self.assertEqual(self.client.get(reverse('core:chat_mark_read', args=[chat.id])).status_code, 405)
+
+
+class CanonicalChatMigrationTests(TransactionTestCase):
+    # Runs 0013 on duplicate and self chats built with the 0012 models
+    before = [('core', '0012_directory_indexes')]
+    after = [('core', '0013_canonical_chat_pairs')]
+
+    def setUp(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.before)
+        self.addCleanup(lambda: MigrationExecutor(connection).migrate(executor.loader.graph.leaf_nodes()))
+        apps = executor.loader.project_state(self.before).apps
+        OldUser = apps.get_model('core', 'User')
+        OldChat = apps.get_model('core', 'MentorshipChat')
+        OldMessage = apps.get_model('core', 'MentorshipMessage')
+
+        self.one = OldUser.objects.create(username='one', email='one@example.com').pk
+        self.two = OldUser.objects.create(username='two', email='two@example.com').pk
+        older = OldChat.objects.create(participant_one_id=self.one, participant_two_id=self.two)
+        newer = OldChat.objects.create(participant_one_id=self.two, participant_two_id=self.one)
+        self_chat = OldChat.objects.create(participant_one_id=self.one, participant_two_id=self.one)
+        self.read = OldMessage.objects.create(chat=older, sender_id=self.two, content="read").pk
+        self.unread = OldMessage.objects.create(chat=newer, sender_id=self.two, content="unread").pk
+        self.later = OldMessage.objects.create(chat=older, sender_id=self.two, content="read later").pk
+        self.reply = OldMessage.objects.create(chat=newer, sender_id=self.one, content="reply").pk
+        self.note = OldMessage.objects.create(chat=self_chat, sender_id=self.one, content="note").pk
+        # `one` read everything in the older chat but nothing in the newer
+        OldChat.objects.filter(pk=older.pk).update(participant_one_last_read=self.later)
+        self.keeper = older.pk
+
+        MigrationExecutor(connection).migrate(self.after)
+
+    def test_duplicates_are_merged_and_self_chats_detached(self):
+        chat = MentorshipChat.objects.get()
+        self.assertEqual(chat.pk, self.keeper)
+        self.assertEqual((chat.participant_one_id, chat.participant_two_id), (self.one, self.two))
+        # Stops below the oldest message `one` had not read in either chat
+        self.assertEqual(chat.participant_one_last_read, self.unread - 1)
+        self.assertEqual(chat.participant_two_last_read, self.reply - 1)
+        self.assertEqual(
+            set(MentorshipMessage.objects.filter(chat=chat).values_list('pk', flat=True)),
+            {self.read, self.unread, self.later, self.reply},
+        )
+        self.assertEqual(
+            sorted(ChatMember.objects.values_list('chat_id', 'user_id')),
+            [(chat.pk, self.one), (chat.pk, self.two)],
+        )
+        self.assertIsNone(MentorshipMessage.objects.get(pk=self.note).chat_id)
+        counts = dict(User.objects.filter(pk__in=[self.one, self.two]).values_list('pk', 'unread_message_count'))
+        self.assertEqual(counts, {self.one: 2, self.two: 1})
+
+
+class FeedRebuildTests(TestCase):
+    def setUp(self):
+        caching.get_cache().clear()
+
+    def test_empty_timeline_is_rebuilt_once(self):
+        user = User.objects.create(username='quiet', email='quiet@example.com')
+        with mock.patch.object(feeds, 'rebuild_user', wraps=feeds.rebuild_user) as rebuild:
+            self.assertFalse(feeds.timeline_page(user).entries)
+            self.assertFalse(feeds.timeline_page(user).entries)
+        rebuild.assert_called_once_with(user.id)
+
+
+@override_settings(PERFORMANCE_SAMPLE_RATE=1.0)
+class PerformanceSamplingTests(TestCase):
+    def setUp(self):
+        caching.get_cache().clear()
+        performance.stats.reset()
+
+    def assert_sampled(self, response):
+        self.assertEqual(response.status_code, 200)
+        self.assertRegex(response['Server-Timing'], r'db;dur=[\d.]+;desc="[1-9]\d* queries"')
+        self.assertNotIn('tpl;dur=0.00', response['Server-Timing'])
+        self.assertEqual(performance.stats.summary()['core:search']['samples'], 1)
+        self.assertIs(DjangoTemplate.render, performance._original_render)
+
+    def test_sync_request_is_sampled(self):
+        self.assert_sampled(self.client.get(reverse('core:search'), {'q': 'reporting'}))
+
+    async def test_async_request_is_sampled(self):
+        self.assert_sampled(await self.async_client.get(reverse('core:search'), {'q': 'reporting'}))
@@ -0,0 +1,97 @@
+import math
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import Case, F, Value, When
+from django.db.models.functions import Greatest, Log
+from django.utils import timezone
+
+from . import caching, rendering
+from .bulk import upsert
+from .models import Blog, TrendingScore
+
+# Scores follow the "hot" ranking: log10(engagement) plus a term that grows
+# with the publish date, so every TRENDING_DECAY_SECONDS of age costs a post
+# one order of magnitude of engagement. Because the time term is fixed per
+# post, scores never need to be rewritten just because the clock moved, and
+# the sidebar is a plain top-K read over an indexed column.
+TRENDING_EPOCH = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+TRENDING_DECAY_SECONDS = getattr(settings, 'TRENDING_DECAY_SECONDS', 45000)
+
+
+def time_base(created_at):
+    return (created_at - TRENDING_EPOCH).total_seconds() / TRENDING_DECAY_SECONDS
+
+
+def compute_score(base, engagement):
+    return base + math.log10(max(engagement, 1))
+
+
+def track_blog(blog):
+    base = time_base(blog.created_at)
+    TrendingScore.objects.get_or_create(
+        blog=blog,
+        defaults={'base': base, 'score': compute_score(base, 0)},
+    )
+
+
+def bump(blog_id, delta):
+    bump_many({blog_id: delta})
+
+
+def bump_many(deltas):
+    # deltas maps blog_id -> engagement delta; one UPDATE for all of them.
+    # score is listed before engagement on purpose: MySQL evaluates SET
+    # assignments left to right, so both sides must see the old engagement.
+    deltas = {blog_id: delta for blog_id, delta in deltas.items() if delta}
+    if not deltas:
+        return 0
+    return TrendingScore.objects.filter(blog_id__in=sorted(deltas)).update(
+        score=Case(*[
+            When(blog_id=blog_id, then=F('base') + Log(Value(10.0), Greatest(F('engagement') + delta, Value(1))))
+            for blog_id, delta in deltas.items()
+        ], default=F('score')),
+        engagement=Case(*[
+            When(blog_id=blog_id, then=F('engagement') + delta) for blog_id, delta in deltas.items()
+        ], default=F('engagement')),
+    )
+
+
+def top_blogs(limit=5):
+    rows = (
+        TrendingScore.objects.select_related('blog__author')
+        .defer(*(f'blog__{field}' for field in rendering.LISTING_DEFERRED))
+        .order_by('-score')[:limit]
+    )
+    return [row.blog for row in rows]
+
+
+def rebuild(batch_size=1000):
+    # Recompute every score from the stored counters; creates missing rows.
+    now = timezone.now()
+    blogs = Blog.objects.values_list(
+        'id', 'created_at', 'like_count', 'dislike_count', 'comment_count'
+    ).order_by('id')
+    batch = []
+    total = 0
+    for blog_id, created_at, likes, dislikes, comments in blogs.iterator(chunk_size=batch_size):
+        base = time_base(created_at)
+        engagement = likes + dislikes + comments
+        batch.append(TrendingScore(
+            blog_id=blog_id,
+            engagement=engagement,
+            base=base,
+            score=compute_score(base, engagement),
+            recomputed_at=now,
+        ))
+        if len(batch) >= batch_size:
+            total += _flush(batch)
+            batch = []
+    if batch:
+        total += _flush(batch)
+    caching.bump('blogs')
+    return total
+
+
+def _flush(batch):
+    return upsert(TrendingScore, batch, 'blog', ['engagement', 'base', 'score', 'recomputed_at'])
@@ -0,0 +1,82 @@
+from django.db import transaction
+from django.db.models import Count, F, Func, IntegerField, Max, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from .counters import shifted
+from .models import MentorshipChat, MentorshipMessage, User
+
+
+def other_participant_id(chat, user_id):
+    if chat.participant_one_id == user_id:
+        return chat.participant_two_id
+    return chat.participant_one_id
+
+
+def add_unread(user_id, amount=1):
+    if amount:
+        User.objects.filter(pk=user_id).update(
+            unread_message_count=shifted('unread_message_count', amount)
+        )
+
+
+def remove_unread(user_id, amount):
+    if amount:
+        User.objects.filter(pk=user_id).update(
+            unread_message_count=shifted('unread_message_count', -amount)
+        )
+
+
+def mark_chat_read(chat, user, through=None):
+    # Advance the user's read cursor to the newest message in the chat, or
+    # to the given message id. Only the chat row is written; the messages
+    # themselves are untouched.
+    field = chat.read_cursor_field(user)
+    cursor = getattr(chat, field)
+    pending = chat.get_unread_messages(user)
+    if through is not None:
+        pending = pending.filter(id__lte=through)
+    pending = pending.aggregate(newest=Max('id'), total=Count('id'))
+    if not pending['total']:
+        return 0
+    with transaction.atomic():
+        # Compare-and-set on the old cursor so concurrent opens decrement once
+        moved = MentorshipChat.objects.filter(pk=chat.pk, **{field: cursor}).update(
+            **{field: pending['newest']}
+        )
+        if not moved:
+            return 0
+        remove_unread(user.id, pending['total'])
+    setattr(chat, field, pending['newest'])
+    return pending['total']
+
+
+def unread_count_annotation(user):
+    # Per-chat unread count for an inbox queryset: the id range above the
+    # user's own cursor, excluding their messages.
+    return Count(
+        'messages',
+        filter=(
+            Q(participant_one=user, messages__id__gt=F('participant_one_last_read'))
+            | Q(participant_two=user, messages__id__gt=F('participant_two_last_read'))
+        ) & ~Q(messages__sender=user),
+    )
+
+
+def unread_subquery():
+    # Messages waiting for the outer user, counted from the chat read cursors
+    rows = (
+        MentorshipMessage.objects.filter(
+            Q(chat__participant_one=OuterRef('pk'), id__gt=F('chat__participant_one_last_read'))
+            | Q(chat__participant_two=OuterRef('pk'), id__gt=F('chat__participant_two_last_read'))
+        )
+        .exclude(sender=OuterRef('pk'))
+        .order_by()
+        .annotate(total=Func(F('id'), function='COUNT'))
+        .values('total')
+    )
+    return Coalesce(Subquery(rows, output_field=IntegerField()), Value(0))
+
+
+def reconcile():
+    # Rewrite every user's counter from the message table in one UPDATE
+    return User.objects.update(unread_message_count=unread_subquery())
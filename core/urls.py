@@ -12,9 +12,22 @@ urlpatterns = [
     path('post/<int:blog_id>/add_comment/', views.add_comment, name='add_comment'),
     path('tutorial/<int:tutorial_id>/add_comment/', views.add_tutorial_comment, name='add_tutorial_comment'),
     path('post/<int:post_id>/', views.post_detail, name='post_detail'),
+    path('vote/<str:kind>/<int:id>/<str:action>/', views.vote, name='vote'),
     path('mentorship/', views.mentorship, name='mentorship'),
     path('chat/<int:id>/<str:id_type>/', views.chat_detail, name='chat_detail'),
     path('chat/send_message/<int:chat_id>/', views.send_message, name='send_message'),
+    path('chat/messages/<int:chat_id>/', views.chat_messages, name='chat_messages'),
+    path('chat/read/<int:chat_id>/', views.chat_mark_read, name='chat_mark_read'),
+    path('chat/events/', views.chat_events, name='chat_events'),
     path('profiles/', views.profiles, name='profiles'),
+    path('search/', views.search_page, name='search'),
+    path('video/<str:kind>/<int:id>/', views.stream_video, name='stream_video'),
+    path('performance/', views.performance_stats, name='performance_stats'),
+    path('jobs/', views.job_status, name='job_status'),
+    path('jobs/<int:job_id>/retry/', views.job_retry, name='job_retry'),
+    path('api/<str:resource>/', views.api_list, name='api_list'),
+    path('api/<str:resource>/<int:id>/', views.api_detail, name='api_detail'),
+    path('api/<str:resource>/<int:id>/comments/', views.api_comments, name='api_comments'),
     path('journalist/<int:id>/', views.journalist_detail_view, name='journalist_detail'),
+    path('journalist/<int:user_id>/follow/', views.toggle_follow, name='toggle_follow'),
 ]
@@ -1,20 +1,49 @@
+import asyncio
+import logging
+from functools import partial
+
+from django.conf import settings
 from django.shortcuts import render, redirect
-from django.http import HttpResponseRedirect
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, HttpResponse, HttpResponseForbidden, HttpResponseRedirect, JsonResponse, StreamingHttpResponse
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
+from django.views.decorators.http import require_http_methods
 from django.urls import reverse
+from django.utils.http import url_has_allowed_host_and_scheme, urlencode
 from .forms import CustomUserCreationForm
 from django.contrib import messages
 from django.contrib.auth import login, logout, authenticate
-from .models import Blog, Comment, Tutorial, Category, MentorshipChat, MentorshipMessage, User, Profile
+from .models import Blog, Comment, Follow, Job, Tutorial, Category, MentorshipChat, MentorshipMessage, User, Profile, SearchDocument, Skill
 from django.shortcuts import render, get_object_or_404
 from django.core.paginator import Paginator
+from .pagination import KeysetPaginator
 from django.utils import timezone
-from django.db.models import Q, Count
+from django.db import transaction
+from django.db.models import Q, Count, Exists, OuterRef
+from . import api, caching, counters, feeds, jobs, performance, realtime, rendering, search, snapshots, streaming, trending, unread, votes
+from .caching import cache_anonymous_page, conditional_page
 
 
 from django.db.models import Q
 from .models import MentorshipMessage
 
+logger = logging.getLogger(__name__)
+
+# Number of chat messages rendered or returned per history window
+CHAT_WINDOW_SIZE = 30
+# Seconds between keep-alive comments on an idle event stream
+SSE_KEEPALIVE_SECONDS = 15
+# Tutorial cards per page of the tutorials listing
+TUTORIALS_PAGE_SIZE = 12
+# Journalist directory: cards per page and the keyset orderings it offers
+DIRECTORY_PAGE_SIZE = 24
+DIRECTORY_SORTS = {
+    'newest': ('-id',),
+    'oldest': ('id',),
+    'location': ('location', 'id'),
+}
+
 def custom_login_required(view_func):
     def wrapped_view(request, *args, **kwargs):
         if not request.user.is_authenticated:
@@ -23,13 +52,6 @@ def custom_login_required(view_func):
         return view_func(request, *args, **kwargs)
     return wrapped_view
 
-def get_total_unread_messages(user):
-    print(user)
-    return MentorshipMessage.objects.filter(
-        Q(chat__participant_one=user) | Q(chat__participant_two=user),
-        is_read=False
-    ).exclude(sender=user).count()
-
 def landing_page(request):
     if request.user.is_authenticated:
         return redirect("core:posts")
@@ -65,34 +87,39 @@ def landing_page(request):
     return render(request, "core/landing.html", {"form": form})
 
 
+@conditional_page('blogs', 'tutorials', 'comments', 'votes', 'profiles', 'timelines')
+@cache_anonymous_page('blogs', 'comments', 'votes', 'profiles')
 def posts_page(request):
-    blogs = Blog.objects.all()[:2]
-    trending_blogs = Blog.objects.annotate(
-        popularity=Count('likes_dislikes') + Count('comments')
-    ).order_by('-popularity')[:5] 
-    
-    total_unread_messages = None
+    # Signed-in users read their precomputed timeline (see core.feeds);
+    # everyone else gets the newest posts
+    cursor = request.GET.get('cursor')
     if request.user.is_authenticated:
-        total_unread_messages = get_total_unread_messages(request.user)
-    
+        feed = feeds.timeline_page(request.user, cursor)
+    else:
+        feed = feeds.latest_page(cursor)
+
+    # Evaluated only if its cached fragment has to be re-rendered; the
+    # template calls trending_blogs itself.
     context = {
-        'blogs': blogs,
-        'trending_blogs': trending_blogs,
-        'total_unread_messages': total_unread_messages  
+        'feed': feed,
+        'trending_blogs': partial(trending.top_blogs, 5),
+        'feed_version': caching.version_token('blogs', 'comments', 'votes', 'profiles'),
     }
     return render(request, "core/posts.html", context)
 
+@conditional_page('blogs', 'comments', 'votes', 'profiles')
+@cache_anonymous_page('blogs', 'comments', 'votes', 'profiles')
 def post_detail(request, post_id):
-    total_unread_messages = None
-    if request.user.is_authenticated:
-        total_unread_messages = get_total_unread_messages(request.user)
-    blog = get_object_or_404(Blog, id=post_id)
-    comments_list = Comment.objects.filter(blog=blog).order_by('created_at')
-    paginator = Paginator(comments_list, 5) 
-    page_number = request.GET.get('page') 
-    comments = paginator.get_page(page_number)  
-
-    return render(request, 'core/post_detail.html', {'blog': blog, 'comments': comments, 'total_unread_messages': total_unread_messages})
+    blog = get_object_or_404(Blog.objects.select_related('author'), id=post_id)
+    comments_list = Comment.objects.filter(blog=blog).select_related('user')
+    paginator = KeysetPaginator(comments_list, 5)
+    comments = paginator.get_page(request.GET.get('cursor'))
+
+    return render(request, 'core/post_detail.html', {
+        'blog': blog,
+        'content_html': rendering.html_for(blog),
+        'comments': comments,
+    })
 
 @custom_login_required
 def add_comment(request, blog_id):
@@ -109,36 +136,62 @@ def add_comment(request, blog_id):
     return redirect('core:post_detail', post_id=blog_id)
 
 
+@conditional_page('tutorials', 'categories', 'comments', 'votes', 'profiles')
+@cache_anonymous_page('tutorials', 'categories', 'comments', 'votes', 'profiles')
 def tutorials(request):
-    total_unread_messages = None
-    if request.user.is_authenticated:
-        total_unread_messages = get_total_unread_messages(request.user)
-    tutorials = Tutorial.objects.all()
-    categories = Category.objects.all()
-    category_id = request.GET.get('category')
-    if category_id:
-        tutorials = tutorials.filter(category__id=category_id)
+    # Two queries per page whatever the filter: the categories with their
+    # stored facet counts, and one keyset page of tutorials
+    categories = list(Category.objects.only('id', 'name', 'tutorial_count').order_by('name', 'id'))
+    selected = next(
+        (category for category in categories if str(category.id) == request.GET.get('category')), None
+    )
+    queryset = Tutorial.objects.select_related('author').defer(*rendering.LISTING_DEFERRED)
+    if selected:
+        queryset = queryset.filter(category=selected)
+    paginator = KeysetPaginator(queryset, TUTORIALS_PAGE_SIZE, ordering=('-created_at', '-id'))
     return render(request, 'core/tutorials.html', {
-        'tutorials': tutorials,
+        'tutorials': paginator.get_page(request.GET.get('cursor')),
         'categories': categories,
-        'total_unread_messages': total_unread_messages
+        'selected_category': selected,
+        'total_count': sum(category.tutorial_count for category in categories),
     })
 
+@conditional_page('tutorials', 'comments', 'votes', 'profiles')
+@cache_anonymous_page('tutorials', 'comments', 'votes', 'profiles')
 def tutorial_detail(request, tutorial_id):
-    total_unread_messages = None
-    if request.user.is_authenticated:
-        total_unread_messages = get_total_unread_messages(request.user)
-    tutorial = get_object_or_404(Tutorial, id=tutorial_id)
-    comments_list = Comment.objects.filter(tutorial=tutorial).order_by('created_at')
-    paginator = Paginator(comments_list, 5)
-    page_number = request.GET.get('page') 
-    comments = paginator.get_page(page_number) 
+    tutorial = get_object_or_404(Tutorial.objects.select_related('author'), id=tutorial_id)
+    comments_list = Comment.objects.filter(tutorial=tutorial).select_related('user')
+    paginator = KeysetPaginator(comments_list, 5)
+    comments = paginator.get_page(request.GET.get('cursor'))
     return render(request, 'core/tutorial_detail.html', {
         'tutorial': tutorial,
+        'content_html': rendering.html_for(tutorial),
         'comments': comments,
-        'total_unread_messages': total_unread_messages 
     })
 
+@custom_login_required
+@require_http_methods(["POST"])
+def vote(request, kind, id, action):
+    model = votes.MODELS.get(kind)
+    if model is None or action not in votes.ACTIONS:
+        raise Http404("Unknown vote.")
+    get_object_or_404(model.objects.only('id'), id=id)
+    result = votes.cast(request.user, kind, id, action)
+
+    if request.headers.get('x-requested-with') == 'XMLHttpRequest':
+        # Stored counters lag behind by whatever is still buffered
+        like_count, dislike_count = model.objects.filter(id=id).values_list('like_count', 'dislike_count').get()
+        pending = counters.buffer.pending(model, id)
+        return JsonResponse({
+            'vote': {True: 'like', False: 'dislike', None: None}[result],
+            'like_count': like_count + pending.get('like_count', 0),
+            'dislike_count': dislike_count + pending.get('dislike_count', 0),
+        })
+    next_url = request.POST.get('next')
+    if next_url and url_has_allowed_host_and_scheme(next_url, allowed_hosts={request.get_host()}):
+        return redirect(next_url)
+    return redirect('core:post_detail' if kind == 'blog' else 'core:tutorial_detail', id)
+
 @custom_login_required
 def add_tutorial_comment(request, tutorial_id):
     tutorial = get_object_or_404(Tutorial, id=tutorial_id)
@@ -156,63 +209,94 @@ def add_tutorial_comment(request, tutorial_id):
 
 @custom_login_required
 def mentorship(request):
-    total_unread_messages = None
-    if request.user.is_authenticated:
-        total_unread_messages = get_total_unread_messages(request.user)
     mentors = User.objects.filter(is_staff=True)
+    # Seeks the (user, chat) membership index instead of ORing the two
+    # participant columns
     user_chats = MentorshipChat.objects.filter(
-        Q(participant_one=request.user) | Q(participant_two=request.user)
-    ).annotate(
-        unread_count=Count(
-            'messages', 
-            filter=Q(messages__is_read=False) & ~Q(messages__sender=request.user)
-        )
+        members__user=request.user
+    ).select_related('participant_one', 'participant_two').annotate(
+        unread_count=unread.unread_count_annotation(request.user)
     ).order_by('-last_message_date')
     return render(request, 'core/mentorship.html', {
         'mentors': mentors,
         'chats': user_chats,
-        'total_unread_messages': total_unread_messages
     })
 
+def chat_window(chat, before=None):
+    # Newest-first keyset page over the chat, returned oldest-first for display
+    paginator = KeysetPaginator(
+        chat.messages.select_related('sender'), CHAT_WINDOW_SIZE, ordering=('-id',)
+    )
+    page = paginator.get_page(before)
+    return {
+        'messages': list(reversed(page.object_list)),
+        'older_cursor': page.next_cursor,
+    }
+
+
+def mark_read_and_notify(request, chat, through=None):
+    # Move the read cursor and the reader's badge counter together
+    marked_read = unread.mark_chat_read(chat, request.user, through)
+    if marked_read:
+        # Keep the in-memory user in step so this page's badge is already correct
+        request.user.unread_message_count = max(request.user.unread_message_count - marked_read, 0)
+        realtime.publish_on_commit(
+            request.user.id, 'unread', {'total_unread_messages': request.user.unread_message_count}
+        )
+    return marked_read
+
+
+def serialize_message(message, user):
+    return {
+        'id': message.id,
+        'sender': message.sender.username,
+        'sender_id': message.sender_id,
+        'content': message.content,
+        'created_at': message.created_at.isoformat(),
+        'is_mine': message.sender_id == user.id,
+        'is_read': message.is_read,
+    }
+
+
 @custom_login_required
 def chat_detail(request, id, id_type):
     participant_one = request.user
-    total_unread_messages = None
-    if request.user.is_authenticated:
-        total_unread_messages = get_total_unread_messages(request.user)
     if id_type == 'chat_id':
-        chat = get_object_or_404(MentorshipChat, id=id)
-        messages = MentorshipMessage.objects.filter(chat=chat).order_by('created_at')
-        participant_two = chat.participant_two
+        chat = get_object_or_404(
+            MentorshipChat.objects.filter(members__user=request.user).select_related('participant_one', 'participant_two'),
+            id=id,
+        )
+        participant_two = chat.participant_two if chat.participant_one_id == request.user.id else chat.participant_one
         created = False
         
     elif id_type == 'recipient_id':
-        chat, created = MentorshipChat.objects.get_or_create(
-            participant_one=participant_one,
-            participant_two_id=id,
-            defaults={'created_at': timezone.now()}
-        )
-        messages = MentorshipMessage.objects.filter(chat=chat).order_by('created_at')
         participant_two = get_object_or_404(User, id=id)
+        if participant_two.id == request.user.id:
+            messages.error(request, "You cannot start a chat with yourself.")
+            return redirect('core:mentorship')
+        chat, created = MentorshipChat.between(request.user.id, participant_two.id)
         
     else:
-        print("id type", id_type)
+        logger.debug("Invalid chat id type %r", id_type)
         return render(request, 'core/error.html', {'message': 'Invalid ID type specified.'})
     
     if created:
-        print("A new chat was created.")
+        logger.debug("Created chat %s between %s and %s", chat.id, participant_one.id, participant_two.id)
+
+    # Only the most recent window of the history is rendered; older windows
+    # are reached through the ?before= cursor or the chat_messages endpoint.
+    window = chat_window(chat, request.GET.get('before'))
 
-    # Update unread messages
-    unread_messages = messages.exclude(sender=request.user).filter(is_read=False)
-    unread_messages.update(is_read=True)
+    mark_read_and_notify(request, chat)
     
     context = {
         'chat': chat,
-        'messages': messages,
+        'messages': window['messages'],
+        'older_cursor': window['older_cursor'],
+        'viewing_older': bool(request.GET.get('before')),
         'chat_created': created,
         'user': participant_one,
         'participant_two': participant_two,
-        'total_unread_messages': total_unread_messages,
     }
     
     return render(request, 'core/chat_detail.html', context)
@@ -220,37 +304,329 @@ def chat_detail(request, id, id_type):
 
 @custom_login_required
 def send_message(request, chat_id):
-    chat = get_object_or_404(MentorshipChat, id=chat_id)
+    chat = get_object_or_404(MentorshipChat.objects.filter(members__user=request.user), id=chat_id)
+    wants_json = request.headers.get('x-requested-with') == 'XMLHttpRequest'
     if request.method == 'POST':
         message_text = request.POST.get('message')
         if message_text:
-            print(chat)
-            MentorshipMessage.objects.create(
-                chat=chat,
-                sender=request.user,
-                content=message_text,
-                created_at=timezone.now()
-            )
-            chat.last_message = message_text
-            chat.last_message_date = timezone.now()
-            chat.save()
-            id_type = 'chat_id'  
-            
+            recipient_id = unread.other_participant_id(chat, request.user.id)
+            with transaction.atomic():
+                message = MentorshipMessage.objects.create(
+                    chat=chat,
+                    sender=request.user,
+                    content=message_text,
+                    created_at=timezone.now()
+                )
+                unread.add_unread(recipient_id)
+                # Only the summary columns: a full save would also write back
+                # read cursors the other participant may have just moved
+                MentorshipChat.objects.filter(pk=chat.pk).update(
+                    last_message=message_text, last_message_date=message.created_at,
+                )
+                publish_new_message(chat, message, recipient_id)
+
+            if wants_json:
+                return JsonResponse({'message': serialize_message(message, request.user)}, status=201)
             return redirect('core:chat_detail', id=chat_id, id_type='chat_id')
 
+    if wants_json:
+        return JsonResponse({'error': 'Message cannot be empty.'}, status=400)
     return redirect('core:chat_detail', id=chat_id, id_type='chat_id')
 
 
+def publish_new_message(chat, message, recipient_id):
+    # Push the message to both participants' open streams, plus the
+    # recipient's new badge count. Delivery happens after commit.
+    for participant_id in {chat.participant_one_id, chat.participant_two_id}:
+        payload = {'chat_id': chat.id, 'message': serialize_message(message, User(id=participant_id))}
+        realtime.publish_on_commit(participant_id, 'message', payload)
+    unread_count = User.objects.filter(pk=recipient_id).values_list('unread_message_count', flat=True).first()
+    realtime.publish_on_commit(recipient_id, 'unread', {'total_unread_messages': unread_count})
+
+
+async def chat_events(request):
+    # Server-Sent Events stream of new messages and badge updates for the
+    # signed-in user. Needs an ASGI server (see journolab/asgi.py); a WSGI
+    # worker would have to hold a thread per open stream.
+    user = await request.auser()
+    if not user.is_authenticated:
+        return HttpResponseForbidden()
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse("Event streams require the ASGI application.", status=501)
+
+    broker = realtime.get_broker()
+
+    async def stream():
+        queue = broker.subscribe(user.id)
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    # Comment line keeps proxies from closing an idle stream
+                    yield ": keep-alive\n\n"
+                    continue
+                yield realtime.format_sse(event)
+        finally:
+            broker.unsubscribe(user.id, queue)
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@custom_login_required
+def chat_messages(request, chat_id):
+    # JSON feed for incremental history loading:
+    #   ?before=<cursor>  the window of messages older than the cursor
+    #   ?since=<id>       messages newer than the given message id
+    chat = get_object_or_404(MentorshipChat.objects.filter(members__user=request.user), id=chat_id)
+    since = request.GET.get('since')
+    if since is not None:
+        try:
+            since_id = int(since)
+        except ValueError:
+            return JsonResponse({'error': 'since must be a message id.'}, status=400)
+        rows = list(
+            chat.messages.filter(id__gt=since_id).select_related('sender').order_by('id')[:CHAT_WINDOW_SIZE + 1]
+        )
+        return JsonResponse({
+            'messages': [serialize_message(message, request.user) for message in rows[:CHAT_WINDOW_SIZE]],
+            'has_more': len(rows) > CHAT_WINDOW_SIZE,
+        })
+
+    window = chat_window(chat, request.GET.get('before'))
+    return JsonResponse({
+        'messages': [serialize_message(message, request.user) for message in window['messages']],
+        'older_cursor': window['older_cursor'],
+    })
+
+
+@custom_login_required
+@require_http_methods(["POST"])
+def chat_mark_read(request, chat_id):
+    # Called by realtime.js for messages that arrive while the chat is open;
+    # a posted `through` message id stops at the newest one the page has shown
+    chat = get_object_or_404(MentorshipChat.objects.filter(members__user=request.user), id=chat_id)
+    through = request.POST.get('through')
+    if through is not None:
+        try:
+            through = int(through)
+        except ValueError:
+            return JsonResponse({'error': 'through must be a message id.'}, status=400)
+    marked_read = mark_read_and_notify(request, chat, through)
+    return JsonResponse({
+        'marked_read': marked_read,
+        'total_unread_messages': request.user.unread_message_count,
+    })
+
+
+def search_page(request):
+    query = request.GET.get('q', '').strip()
+    kind = request.GET.get('kind')
+    kinds = [kind] if kind in dict(SearchDocument.KIND_CHOICES) else None
+    page = None
+    results = []
+    if query:
+        paginator = Paginator(search.search_documents(query, kinds=kinds), 10)
+        page = paginator.get_page(request.GET.get('page'))
+        results = search.load_objects(page.object_list)
+    return render(request, 'core/search.html', {
+        'query': query,
+        'kind': kind if kinds else '',
+        'page': page,
+        'results': results,
+    })
+
+
+@require_http_methods(['GET', 'HEAD'])
+def stream_video(request, kind, id):
+    # Video playback with seeking support; see core.streaming.serve_file
+    model = {'blog': Blog, 'tutorial': Tutorial}.get(kind)
+    if model is None:
+        raise Http404("Unknown video source.")
+    obj = get_object_or_404(model.objects.only('id', 'video'), id=id)
+    if not obj.video:
+        raise Http404("No video attached.")
+    return streaming.serve_file(request, obj.video)
+
+
+@staff_member_required
+def performance_stats(request):
+    # Per-view latency percentiles of the requests sampled by this process
+    return JsonResponse({
+        'sample_rate': getattr(settings, 'PERFORMANCE_SAMPLE_RATE', 0.0),
+        'views': performance.stats.summary(),
+    })
+
+
+@staff_member_required
+def job_status(request):
+    # Queue health for staff: counts per task and state, what is running,
+    # the oldest due job and the latest failures
+    now = timezone.now()
+    statuses = [status for status, _ in Job.STATUS_CHOICES]
+    counts = {}
+    for row in Job.objects.values('task', 'status').annotate(total=Count('id')).order_by('task'):
+        counts.setdefault(row['task'], {})[row['status']] = row['total']
+    oldest_due = Job.objects.filter(status='queued', run_after__lte=now).order_by('run_after').values_list(
+        'run_after', flat=True
+    ).first()
+    return render(request, 'core/job_status.html', {
+        'statuses': statuses,
+        'tasks': [(task, [per_status.get(status, 0) for status in statuses]) for task, per_status in counts.items()],
+        'queue_delay': (now - oldest_due) if oldest_due else None,
+        'running': Job.objects.filter(status='running').order_by('started_at')[:50],
+        'failures': Job.objects.filter(status='failed').order_by('-finished_at')[:20],
+        'retrying': Job.objects.filter(status='queued', attempts__gt=0).order_by('run_after')[:20],
+    })
+
+
+@staff_member_required
+@require_http_methods(["POST"])
+def job_retry(request, job_id):
+    if jobs.retry(job_id):
+        messages.success(request, f"Job {job_id} was queued again.")
+    else:
+        messages.error(request, f"Job {job_id} is not a failed job.")
+    return redirect('core:job_status')
+
+
+def _api_error(message, status):
+    return JsonResponse({'error': message}, status=status)
+
+
+def _api_page_url(request, cursor):
+    if cursor is None:
+        return None
+    params = request.GET.copy()
+    params['cursor'] = cursor
+    return f"{request.path}?{params.urlencode()}"
+
+
+def _api_list_response(request, resource, base=None):
+    try:
+        page, names = api.get_page(resource, request.GET, base)
+    except api.InvalidRequest as error:
+        return _api_error(str(error), 400)
+    return StreamingHttpResponse(
+        api.stream_page(
+            resource, page, names,
+            _api_page_url(request, page.next_cursor), _api_page_url(request, page.previous_cursor),
+        ),
+        content_type='application/json',
+    )
+
+
+@require_http_methods(['GET', 'HEAD'])
+def api_list(request, resource):
+    # Read-only JSON API; see core.api for fields, filters and paging
+    resource = api.RESOURCES.get(resource)
+    if resource is None:
+        return _api_error("Unknown resource.", 404)
+    return _api_list_response(request, resource)
+
+
+@require_http_methods(['GET', 'HEAD'])
+def api_detail(request, resource, id):
+    resource = api.RESOURCES.get(resource)
+    if resource is None:
+        return _api_error("Unknown resource.", 404)
+    try:
+        data = api.get_object(resource, id, request.GET)
+    except api.InvalidRequest as error:
+        return _api_error(str(error), 400)
+    if data is None:
+        return _api_error("Not found.", 404)
+    return JsonResponse(data)
+
+
+@require_http_methods(['GET', 'HEAD'])
+def api_comments(request, resource, id):
+    parent_field = api.COMMENT_PARENTS.get(resource)
+    if parent_field is None:
+        return _api_error("Unknown resource.", 404)
+    if not api.RESOURCES[resource].model.objects.filter(pk=id).exists():
+        return _api_error("Not found.", 404)
+    return _api_list_response(request, api.COMMENTS, Comment.objects.filter(**{parent_field: id}))
+
+
+def directory_page(filters, sort, cursor):
+    # One keyset page of the journalist directory: a single query joining
+    # the user and the profile snapshot the cards render from
+    profiles = Profile.objects.select_related('user', 'snapshot')
+    if filters['location']:
+        profiles = profiles.filter(location=filters['location'])
+    if filters['skill']:
+        profiles = profiles.filter(
+            Exists(Skill.objects.filter(profile=OuterRef('pk'), name=filters['skill']))
+        )
+    page = KeysetPaginator(profiles, DIRECTORY_PAGE_SIZE, DIRECTORY_SORTS[sort]).get_page(cursor)
+    page.cards = snapshots.for_profiles(page.object_list)
+    return page
+
+
+@conditional_page('profiles')
+@cache_anonymous_page('profiles')
 def profiles(request):
-    journalist_profiles = Profile.objects.all()
-    return render(request, 'core/profiles.html', {'journalist_profiles': journalist_profiles})
+    filters = {
+        'location': request.GET.get('location', '').strip(),
+        'skill': request.GET.get('skill', '').strip(),
+    }
+    sort = request.GET.get('sort')
+    if sort not in DIRECTORY_SORTS:
+        sort = 'newest'
+    query = {key: value for key, value in filters.items() if value}
+    if sort != 'newest':
+        query['sort'] = sort
+
+    # The page and the facet lists are only evaluated when the cached
+    # fragment has to be re-rendered
+    return render(request, 'core/profiles.html', {
+        'directory_page': partial(directory_page, filters, sort, request.GET.get('cursor')),
+        'locations': Profile.objects.exclude(location='').order_by('location')
+            .values_list('location', flat=True).distinct(),
+        'skills': Skill.objects.order_by('name').values_list('name', flat=True).distinct(),
+        'filters': filters,
+        'sort': sort,
+        'sorts': DIRECTORY_SORTS,
+        'filter_query': urlencode(query),
+        'profiles_version': caching.version_token('profiles'),
+    })
 
+@conditional_page('profiles', 'follows')
+@cache_anonymous_page('profiles')
 def journalist_detail_view(request, id):
-    # Fetch the journalist profile based on the ID
-    profile = get_object_or_404(Profile, id=id)
-    
-    # Render the template with the profile context
-    return render(request, 'core/journalist_detail.html', {'profile': profile})
+    # The whole page renders from the profile's snapshot, one primary-key read
+    profile = snapshots.get(id)
+    if profile is None:
+        raise Http404("No such profile.")
+    is_following = (
+        request.user.is_authenticated
+        and Follow.objects.filter(follower=request.user, author_id=profile['user']['id']).exists()
+    )
+    return render(request, 'core/journalist_detail.html', {'profile': profile, 'is_following': is_following})
+
+@custom_login_required
+@require_http_methods(["POST"])
+def toggle_follow(request, user_id):
+    author = get_object_or_404(User, id=user_id)
+    if author == request.user:
+        messages.error(request, "You cannot follow yourself.")
+    else:
+        # The signals in core.signals add or drop the author's posts in the timeline
+        deleted, _ = Follow.objects.filter(follower=request.user, author=author).delete()
+        if deleted:
+            messages.success(request, f"You unfollowed {author.username}.")
+        else:
+            Follow.objects.get_or_create(follower=request.user, author=author)
+            messages.success(request, f"You are now following {author.username}.")
+    next_url = request.POST.get('next')
+    if next_url and url_has_allowed_host_and_scheme(next_url, allowed_hosts={request.get_host()}):
+        return redirect(next_url)
+    return redirect('core:posts')
 
 def login_view(request):
     if request.method == 'POST':
@@ -0,0 +1,37 @@
+from django.db import IntegrityError, transaction
+
+from .models import Blog, LikeDislike, Tutorial
+
+MODELS = {'blog': Blog, 'tutorial': Tutorial}
+ACTIONS = ('like', 'dislike', 'unlike')
+
+
+def cast(user, kind, object_id, action):
+    """
+    Set a user's vote on a blog or tutorial and return it (True for a like,
+    False for a dislike, None once removed). Repeating a request is a no-op.
+    Only the voter's own LikeDislike row is locked; the parent's counters
+    are updated through the counter buffer by core.signals.
+    """
+    target = {f'{kind}_id': object_id}
+    votes = LikeDislike.objects.select_for_update().filter(user=user, **target)
+    with transaction.atomic():
+        vote = votes.first()
+        if action == 'unlike':
+            if vote is not None:
+                vote.delete()
+            return None
+
+        is_like = action == 'like'
+        if vote is None:
+            try:
+                with transaction.atomic():
+                    LikeDislike.objects.create(user=user, is_like=is_like, **target)
+                return is_like
+            except IntegrityError:
+                # A concurrent request from the same user inserted first
+                vote = votes.get()
+        if vote.is_like != is_like:
+            vote.is_like = is_like
+            vote.save(update_fields=['is_like'])
+    return is_like
@@ -5,6 +5,10 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
+
+Serve the project with an ASGI server (e.g. ``uvicorn journolab.asgi:application``)
+to enable the mentorship event stream at ``/chat/events/``; long-lived
+streams are handled on the event loop instead of tying up a worker each.
 """
 
 import os
@@ -61,6 +61,7 @@ INTERNAL_IPS = [
 NPM_BIN_PATH = "C:/Program Files/nodejs/npm.cmd"
 
 MIDDLEWARE = [
+    'core.performance.PerformanceMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -84,12 +85,64 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'core.context_processors.unread_messages',
             ],
         },
     },
 ]
 
 WSGI_APPLICATION = 'journolab.wsgi.application'
+ASGI_APPLICATION = 'journolab.asgi.application'
+
+# Pub/sub used to push mentorship messages to open event streams. The
+# in-process broker only reaches streams served by the same process; swap
+# in a class with the same subscribe/unsubscribe/publish methods backed by
+# an external broker when running several workers.
+REALTIME_BROKER = 'core.realtime.InProcessBroker'
+
+# Request profiling (core.performance). A sampled request gets a
+# Server-Timing header and counts towards the per-view percentiles at
+# /performance/; sampled requests slower than PERFORMANCE_SLOW_REQUEST_MS are
+# logged to 'core.performance' with their costliest SQL. 0 disables sampling.
+PERFORMANCE_SAMPLE_RATE = 1.0 if DEBUG else 0.05
+PERFORMANCE_SLOW_REQUEST_MS = 500
+PERFORMANCE_SLOW_SQL_LIMIT = 5
+
+# Background jobs (core.jobs): side effects such as image variants and feed
+# fan-out are stored in the database and run by `manage.py run_jobs`
+# workers. Failed jobs are retried JOBS_MAX_ATTEMPTS times with exponential
+# backoff starting at JOBS_BACKOFF_SECONDS; a job running for longer than
+# JOBS_TIMEOUT_SECONDS is assumed lost and handed out again. Finished jobs
+# (and their idempotency keys) are kept for JOBS_RETENTION_DAYS. With
+# JOBS_EAGER, jobs run in-process right after commit instead (no worker).
+JOBS_EAGER = False
+JOBS_MAX_ATTEMPTS = 5
+JOBS_BACKOFF_SECONDS = 10
+JOBS_BACKOFF_MAX_SECONDS = 3600
+JOBS_TIMEOUT_SECONDS = 600
+JOBS_RETENTION_DAYS = 7
+
+# Precomputed feeds (core.feeds). New blogs and tutorials are fanned out to
+# their readers' timelines by a background job. Run `manage.py refresh_feeds`
+# periodically to merge trending posts in and trim timelines to
+# FEED_MAX_ENTRIES rows and FEED_RETENTION_DAYS days. An empty timeline is
+# rebuilt when it is read, at most once per FEED_REBUILD_INTERVAL seconds.
+FEED_PAGE_SIZE = 10
+FEED_MAX_ENTRIES = 500
+FEED_RETENTION_DAYS = 90
+FEED_TRENDING_ENTRIES = 10
+FEED_REBUILD_INTERVAL = 3600
+
+# Like/dislike/comment counters (core.counters) are buffered per process and
+# written in batches once this many rows are dirty or this many seconds after
+# the first pending change. A flush interval of 0 writes every change through.
+COUNTER_BUFFER_MAX_PENDING = 500
+COUNTER_BUFFER_FLUSH_SECONDS = 2.0
+
+# Read-only JSON API (core.api) under /api/: rows per list page by default,
+# and the most a client may ask for with ?limit=.
+API_PAGE_SIZE = 20
+API_MAX_PAGE_SIZE = 100
 
 
 # Database
@@ -106,6 +159,21 @@ DATABASES = {
     }
 }
 
+# Cache
+# Pages and fragments cached by core.caching live in PAGE_CACHE_ALIAS. The
+# local-memory cache is per process, which suits development and tests; point
+# it at a shared backend (django.core.cache.backends.redis.RedisCache or
+# memcached) in production so generation bumps reach every worker.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'journolab',
+    },
+}
+PAGE_CACHE_ALIAS = 'default'
+PAGE_CACHE_TIMEOUT = 3600
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -155,6 +223,12 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Video responses from core:stream_video can be handed to the front proxy:
+# None (Django streams the file), 'x-accel-redirect' (nginx, internal
+# location at MEDIA_ACCEL_PREFIX) or 'x-sendfile' (Apache/lighttpd).
+MEDIA_SENDFILE = None
+MEDIA_ACCEL_PREFIX = '/protected-media/'
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
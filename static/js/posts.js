@@ -1,39 +1,32 @@
 // posts.js
 
-function likePost(blogId) {
-    fetch(`/like/${blogId}/`, {
+// Like/dislike forms (core/partials/vote_buttons.html) are sent in the
+// background; a vote that is already set turns its button into an undo.
+document.addEventListener('submit', function (event) {
+    const form = event.target.closest('[data-vote-form]');
+    if (!form) {
+        return;
+    }
+    event.preventDefault();
+    fetch(form.action, {
         method: 'POST',
-        headers: {
-            'Content-Type': 'application/json',
-            'X-CSRFToken': getCookie('csrftoken'),  // Assumes you have a CSRF token setup
-        },
-        body: JSON.stringify({
-            'liked': true,
-        }),
+        body: new FormData(form),
+        headers: { 'X-Requested-With': 'XMLHttpRequest' },
     })
-    .then(response => response.json())
+    .then(response => response.ok ? response.json() : Promise.reject(response.status))
     .then(data => {
-        if (data.success) {
-            // Optionally update the UI to reflect the like
-            alert('Post liked successfully!');
-        }
+        const scope = form.closest('[data-vote-scope]') || document;
+        scope.querySelectorAll('[data-like-count]').forEach(element => {
+            element.textContent = data.like_count;
+        });
+        scope.querySelectorAll('[data-dislike-count]').forEach(element => {
+            element.textContent = data.dislike_count;
+        });
+        scope.querySelectorAll('[data-vote-form]').forEach(voteForm => {
+            const active = voteForm.dataset.vote === data.vote;
+            voteForm.action = active ? voteForm.dataset.undoUrl : voteForm.dataset.voteUrl;
+            voteForm.querySelector('button').classList.toggle('font-bold', active);
+        });
     })
     .catch(error => console.error('Error:', error));
-}
-
-// Function to get CSRF token from cookies
-function getCookie(name) {
-    let cookieValue = null;
-    if (document.cookie && document.cookie !== '') {
-        const cookies = document.cookie.split(';');
-        for (let i = 0; i < cookies.length; i++) {
-            const cookie = cookies[i].trim();
-            // Check if this cookie string begins with the desired name
-            if (cookie.substring(0, name.length + 1) === (name + '=')) {
-                cookieValue = decodeURIComponent(cookie.substring(name.length + 1));
-                break;
-            }
-        }
-    }
-    return cookieValue;
-}
+});
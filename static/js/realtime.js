@@ -0,0 +1,118 @@
+// realtime.js
+// Listens on the server-sent event stream for new mentorship messages and
+// unread badge updates, and sends chat messages without a page reload.
+
+(function () {
+    const script = document.currentScript;
+    const eventsUrl = script && script.dataset.eventsUrl;
+    const inboxUrl = script && script.dataset.inboxUrl;
+    if (!eventsUrl || !window.EventSource) {
+        return;
+    }
+
+    function updateBadge(count) {
+        let badge = document.getElementById('unread-badge');
+        if (!badge) {
+            const link = inboxUrl && document.querySelector(`a[href="${inboxUrl}"]`);
+            if (!link) {
+                return;
+            }
+            badge = document.createElement('span');
+            badge.id = 'unread-badge';
+            badge.className = 'bg-red-500 text-white text-xs font-bold px-2 py-1 rounded-full';
+            link.appendChild(badge);
+        }
+        badge.textContent = count;
+        badge.style.display = count > 0 ? '' : 'none';
+    }
+
+    function appendMessage(container, message) {
+        if (container.querySelector(`[data-message-id="${message.id}"]`)) {
+            return;
+        }
+        const empty = document.getElementById('chat-empty');
+        if (empty) {
+            empty.remove();
+        }
+        const row = document.createElement('div');
+        row.className = `flex ${message.is_mine ? 'justify-end' : 'justify-start'}`;
+        row.dataset.messageId = message.id;
+
+        const bubble = document.createElement('div');
+        bubble.className = `w-1/2 ${message.is_mine ? 'bg-black text-white' : 'bg-[#000080]'} p-4 rounded-lg shadow-lg`;
+
+        const text = document.createElement('p');
+        const sender = document.createElement('strong');
+        sender.textContent = `${message.sender}:`;
+        text.appendChild(sender);
+        text.appendChild(document.createTextNode(` ${message.content}`));
+
+        const date = document.createElement('p');
+        date.className = 'text-sm text-white';
+        date.textContent = new Date(message.created_at).toLocaleString();
+
+        bubble.appendChild(text);
+        bubble.appendChild(date);
+        row.appendChild(bubble);
+        container.appendChild(row);
+        row.scrollIntoView({ block: 'end' });
+    }
+
+    function markRead(container, messageId) {
+        // Advance the read cursor for a message seen in the open chat
+        const token = document.querySelector('#chat-form [name="csrfmiddlewaretoken"]');
+        if (!container.dataset.readUrl || !token) {
+            return;
+        }
+        const body = new FormData();
+        body.append('through', messageId);
+        fetch(container.dataset.readUrl, {
+            method: 'POST',
+            body: body,
+            headers: { 'X-CSRFToken': token.value, 'X-Requested-With': 'XMLHttpRequest' },
+        })
+        .catch(error => console.error('Error:', error));
+    }
+
+    const source = new EventSource(eventsUrl);
+
+    source.addEventListener('unread', function (event) {
+        updateBadge(JSON.parse(event.data).total_unread_messages);
+    });
+
+    source.addEventListener('message', function (event) {
+        const data = JSON.parse(event.data);
+        const container = document.getElementById('chat-messages');
+        if (container && String(data.chat_id) === container.dataset.chatId) {
+            appendMessage(container, data.message);
+            if (!data.message.is_mine) {
+                markRead(container, data.message.id);
+            }
+        }
+    });
+
+    document.addEventListener('DOMContentLoaded', function () {
+        const form = document.getElementById('chat-form');
+        const container = document.getElementById('chat-messages');
+        if (!form || !container) {
+            return;
+        }
+        form.addEventListener('submit', function (event) {
+            event.preventDefault();
+            const body = new FormData(form);
+            fetch(form.action, {
+                method: 'POST',
+                body: body,
+                headers: { 'X-Requested-With': 'XMLHttpRequest' },
+            })
+            .then(response => response.json())
+            .then(data => {
+                if (data.message) {
+                    appendMessage(container, data.message);
+                    form.reset();
+                }
+            })
+            .catch(error => console.error('Error:', error));
+        });
+    });
+})();